@@ -0,0 +1,9 @@
+from extraction_rules import run_extraction, run_options
+
+# Fills every Raw Extract column that has an entry in extraction_rules.json ("Contain Personal Data",
+# "What Personal Data is involved", "Description") from one parse per PDF, reading and writing
+# Extract.xlsx once. Replaces running stages 1, 2 and 3 one after another.
+
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    run_extraction(**run_options())
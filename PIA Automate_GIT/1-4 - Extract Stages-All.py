@@ -0,0 +1,21 @@
+import os
+import runpy
+
+from extraction_rules import EXTRACT_PATH, run_extraction, run_options
+from workbook_session import workbook_session
+
+# Runs every stage that works on Extract.xlsx in one process and one workbook session: the
+# Raw Extract columns (as "1-3 - Text Extraction-All.py"), then the stages below in order.
+# Each sheet is read from disk at most once and the workbook is saved once at the end,
+# instead of one full load/save of Extract.xlsx per sheet written by each stage.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FOLLOW_UP_STAGES = ["4.0 - ID to PD Mapping.py", "4.1 - Vendor Extraction.py"]
+
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    with workbook_session(EXTRACT_PATH):
+        run_extraction(**run_options())
+        for script in FOLLOW_UP_STAGES:
+            print(f"\n▶️ Running {script}")
+            runpy.run_path(os.path.join(SCRIPT_DIR, script), run_name="__main__")
+    print("✅ Extract.xlsx stages completed.")
@@ -1,44 +1,56 @@
-import pandas as pd
+from keyword_matcher import KeywordMatcher
+from parquet_store import write_dataset
+from row_sink import RowSink
+from workbook_session import workbook_session
 
 # Define the file path
 EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
 
-# Load sheets into DataFrames
-data_identifiers_df = pd.read_excel(EXTRACT_PATH, sheet_name="Data Identifiers")
-raw_extract_df = pd.read_excel(EXTRACT_PATH, sheet_name="Raw Extract")
+# Load sheets into DataFrames (shared with the other stages when run inside one workbook session)
+with workbook_session(EXTRACT_PATH) as book:
+    data_identifiers_df = book.read("Data Identifiers")
+    raw_extract_df = book.read("Raw Extract")
 
-# Prepare the output DataFrame for "ID to PD Mapping"
+# Prepare the output columns for "ID to PD Mapping"
 id_to_pd_mapping_cols = list(raw_extract_df.columns) + list(data_identifiers_df.columns[:3])
-id_to_pd_mapping_df = pd.DataFrame(columns=id_to_pd_mapping_cols)
 
 # Step 1: Match keywords and copy rows
-for _, keyword_row in data_identifiers_df.iterrows():
-    keyword = str(keyword_row["Keywords"]).strip()
-    # Find rows in Raw Extract where "What Personal Data is involved" contains the keyword (literal match)
-    matched_rows = raw_extract_df[
-        raw_extract_df["What Personal Data is involved"].str.contains(keyword, case=False, na=False, regex=False)
-    ]
-
-    for _, matched_row in matched_rows.iterrows():
-        # Extract all columns from Raw Extract
-        raw_data = matched_row.tolist()
-        # Extract columns 1-3 from Data Identifiers
-        identifier_data = keyword_row.iloc[:3].tolist()
-        # Combine and append
-        id_to_pd_mapping_df.loc[len(id_to_pd_mapping_df)] = raw_data + identifier_data
+# All keywords go into one automaton (same case-insensitive literal match as
+# str.contains(case=False, regex=False)), so each row's text is scanned once.
+keywords = [str(keyword).strip() for keyword in data_identifiers_df["Keywords"]]
+identifier_data = [row[:3] for row in data_identifiers_df.itertuples(index=False, name=None)]
+matcher = KeywordMatcher(((keyword, k) for k, keyword in enumerate(keywords)), whole_word=False, fold=str.upper)
+empty_keywords = [k for k, keyword in enumerate(keywords) if not keyword]  # "" is contained in every text
+
+# keyword index -> matching Raw Extract row positions, in row order
+hits = {k: [] for k in range(len(keywords))}
+for pos, text in enumerate(raw_extract_df["What Personal Data is involved"]):
+    if not isinstance(text, str):
+        continue
+    for k in empty_keywords + matcher.labels_in(text):
+        hits[k].append(pos)
+
+raw_rows = list(raw_extract_df.itertuples(index=False, name=None))
+sink = RowSink(id_to_pd_mapping_cols)
+matched_ids = set()  # IDs already in mapping
+for k in range(len(keywords)):
+    for pos in hits[k]:
+        # All columns from Raw Extract + columns 1-3 from Data Identifiers
+        sink.append_values(raw_rows[pos] + identifier_data[k])
+        matched_ids.add(raw_rows[pos][0])
+print(f"{len(sink)} keyword hit(s) across {len(keywords)} keyword(s) and {len(raw_rows)} row(s)")
 
 # Step 2: Check IDs that were not matched
-matched_ids = set(id_to_pd_mapping_df.iloc[:, 0])  # IDs already in mapping
-for _, raw_row in raw_extract_df.iterrows():
-    raw_id = raw_row.iloc[0]
-    if raw_id not in matched_ids:
-        # Add all columns from Raw Extract
-        raw_data = raw_row.tolist()
+for raw_row in raw_rows:
+    if raw_row[0] not in matched_ids:
         # Add "No Keyword found" in column after Raw Extract columns, and empty for next two
-        id_to_pd_mapping_df.loc[len(id_to_pd_mapping_df)] = raw_data + ["No Keyword found", "", ""]
+        sink.append_values(raw_row + ("No Keyword found", "", ""))
+
+id_to_pd_mapping_df = sink.to_frame()
 
 # Write back to Excel
-with pd.ExcelWriter(EXTRACT_PATH, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-    id_to_pd_mapping_df.to_excel(writer, sheet_name="ID to PD Mapping", index=False)
+with workbook_session(EXTRACT_PATH) as book:
+    book.replace("ID to PD Mapping", id_to_pd_mapping_df)
+write_dataset(id_to_pd_mapping_df, "ID to PD Mapping")
 
 print("Process completed successfully!")
@@ -4,7 +4,12 @@ import re
 import sys
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
-from PyPDF2 import PdfReader
+from parquet_store import write_dataset
+from pdf_catalog import open_catalog
+from pdf_text_cache import get_page_texts
+from row_sink import RowSink
+from vendor_lexicon import load_vendor_matcher
+from workbook_session import workbook_session
 
 # ========= USER CONFIG =========
 EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
@@ -34,13 +39,6 @@ def normalize_id(val) -> Optional[str]:
     m = re.search(r'(\d+)', s)
     return m.group(1) if m else None
 
-def extract_id_from_filename(filename: str) -> Optional[str]:
-    """ Extract trailing numeric ID that appears after the LAST '_' in the filename (before extension). Example: 'SomeFile_12345.pdf' -> '12345' """
-    base = os.path.basename(filename)
-    name, _ = os.path.splitext(base)
-    m = re.search(r'_(\d+)$', name)
-    return m.group(1) if m else None
-
 # ========= PDF PARSING =========
 # SECTION NUMBER RULE:
 # - Must be dotted: X.Y (e.g., 1.3, 3.41, 13.2)
@@ -61,9 +59,8 @@ def build_stop_regex(words: List[str]) -> re.Pattern:
 STOP_WORD_RE = build_stop_regex(STOP_WORDS)
 RESPONSE_START_RE = build_stop_regex(RESPONSE_START_WORDS)
 
-# Whole-word regexes for vendor names (case-insensitive)
-BLIS_WORD_RE = re.compile(r'\bblis\b', flags=re.IGNORECASE)
-VISTAR_WORD_RE = re.compile(r'\bvistar\b', flags=re.IGNORECASE)
+# Vendor names/aliases from vendor_lexicon.json: one whole-word, case-insensitive scan per line
+VENDOR_MATCHER = load_vendor_matcher()
 
 # ===== Helpers (normalize / filters) =====
 def _normalize_line_for_questions(line: str) -> str:
@@ -117,122 +114,74 @@ def _is_punctuation_only(line: str) -> bool:
         return False
     return bool(re.fullmatch(r'[\s\/\._~\*–—\-]+', s)) and len(s) <= 3
 
-# ===== QUESTIONS CAPTURE =====
-def extract_sections_questions(pdf_path: str) -> Dict[str, str]:
-    """ Build a mapping of section number -> captured question text (revised criteria)
-        - Start capture immediately after the section number: include any text on the header line after the token, then continue capturing subsequent lines.
-        - Stop when a line is exactly one of the STOP_WORDS (case-insensitive, only the word on the line).
-        - Also stop when a new section header is encountered (to avoid mixing sections).
-        - Do not add duplicate statements/lines.
-        - Skip page-number lines.
+# ===== SINGLE-PASS PDF SCAN (questions + vendor response paragraphs + occurrences) =====
+def scan_pdf(pdf_path: str) -> Tuple[Dict[str, str], Dict[str, Dict[str, List[str]]], List[Tuple[str, str, str]]]:
+    """ Walk every line of the PDF once and build, together:
+        1) section_to_question: section number -> captured question text
+           - Start capture immediately after the section number: include any text on the header line after the token, then continue capturing subsequent lines.
+           - Stop when a line is exactly one of the STOP_WORDS (case-insensitive, only the word on the line).
+           - Also stop when a new section header is encountered (to avoid mixing sections).
+           - Do not add duplicate statements/lines. Skip page-number lines.
+        2) response_map: section_number -> {vendor: [para1, para2...], ...} (vendors from the lexicon)
+           - Start response capture after a line that is exactly one of RESPONSE_START_WORDS.
+           - Stop response capture at the next section header.
+           - Within the response block, split into paragraphs by blank lines (and single-word headings).
+           - If a paragraph contains a lexicon vendor name or alias (whole-word), capture the entire paragraph.
+           - Skip obvious page-number lines (including N/M formats).
+           - Remove duplicate lines within a paragraph (case-insensitive, whitespace-normalized), preserving order.
+           - Dedup paragraphs per vendor (case-insensitive, whitespace-normalized).
+           - Preserve bullets/line breaks in the saved paragraph text.
+        3) occurrences: [(vendor, found_in_display, question_text), ...]
+           - Mentions before the first section -> Found in = "Cover Page", Questions = "Cover Page".
+           - Mentions within a section -> Found in = section number, Questions = section_to_question[section].
+           - Whole-word matches only for lexicon vendor names/aliases.
+        The three captures keep independent state; question text for occurrences is resolved at EOF,
+        once every section's question is known.
     """
     section_to_question: Dict[str, str] = {}
+    result: Dict[str, Dict[str, List[str]]] = {}
+    occurrences: List[Tuple[str, str, str]] = []
     try:
-        reader = PdfReader(pdf_path)
+        page_texts = get_page_texts(pdf_path)
     except Exception as e:
         warn(f"Failed to open PDF '{pdf_path}': {e}")
-        return section_to_question
+        return section_to_question, result, occurrences
 
+    # --- shared state: last section header seen (None = cover page) ---
     current_section: Optional[str] = None
+
+    # --- questions state ---
+    question_section: Optional[str] = None
     lines_seen: set = set()
     captured_lines: List[str] = []
     capturing: bool = False
 
-    def finalize_current():
-        nonlocal current_section, captured_lines, lines_seen, capturing
-        if current_section is not None and current_section not in section_to_question:
-            text = " ".join(captured_lines).strip()
-            section_to_question[current_section] = text
-        current_section = None
-        captured_lines = []
-        lines_seen = set()
-        capturing = False
-
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            text = ""
-        for raw_line in text.splitlines():
-            line = raw_line.strip()
-            # New section header?
-            m = SECTION_LINE_RE.match(line)
-            if m:
-                if capturing:
-                    finalize_current()
-                current_section = m.group(1)
-                captured_lines = []
-                lines_seen = set()
-                capturing = True
-                after = _normalize_line_for_questions((m.group(2) or "").strip())
-                if after and not _is_page_number_line(after):
-                    key = _norm_key(after)
-                    if key not in lines_seen:
-                        captured_lines.append(after)
-                        lines_seen.add(key)
-                continue
-
-            if capturing and current_section is not None:
-                if STOP_WORD_RE.match(line):
-                    finalize_current()
-                    continue
-                m2 = SECTION_LINE_RE.match(line)
-                if m2:
-                    finalize_current()
-                    # Begin new capture scope on the same line
-                    current_section = m2.group(1)
-                    captured_lines = []
-                    lines_seen = set()
-                    capturing = True
-                    after2 = _normalize_line_for_questions((m2.group(2) or "").strip())
-                    if after2 and not _is_page_number_line(after2):
-                        key2 = _norm_key(after2)
-                        if key2 not in lines_seen:
-                            captured_lines.append(after2)
-                            lines_seen.add(key2)
-                    continue
-
-                norm = _normalize_line_for_questions(line)
-                if norm and not _is_page_number_line(norm):
-                    keyn = _norm_key(norm)
-                    if keyn not in lines_seen:
-                        captured_lines.append(norm)
-                        lines_seen.add(keyn)
-
-    if capturing and current_section is not None:
-        finalize_current()
-    return section_to_question
-
-# ===== RESPONSE PARAGRAPHS (vendor keyword found) =====
-def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, List[str]]]:
-    """ Build a mapping: section_number -> {"Blis": [para1, para2...], "Vistar": [para1, ...]}
-        Rules:
-        - Start response capture after a line that is exactly one of RESPONSE_START_WORDS.
-        - Stop response capture at the next section header.
-        - Within the response block, split into paragraphs by blank lines (and single-word headings).
-        - If a paragraph contains 'Blis' or 'Vistar' (whole-word), capture the entire paragraph.
-        - Skip obvious page-number lines (including N/M formats).
-        - Remove duplicate lines within a paragraph (case-insensitive, whitespace-normalized), preserving order.
-        - Dedup paragraphs per vendor (case-insensitive, whitespace-normalized).
-        - Preserve bullets/line breaks in the saved paragraph text.
-    """
-    result: Dict[str, Dict[str, List[str]]] = {}
-    try:
-        reader = PdfReader(pdf_path)
-    except Exception as e:
-        warn(f"Failed to open PDF '{pdf_path}': {e}")
-        return result
-
-    current_section: Optional[str] = None
+    # --- response paragraphs state ---
     in_response: bool = False
     paragraph_lines: List[str] = []
     seen_line_keys_in_para: set = set()
     last_line_key: Optional[str] = None
+    # Track dedup sets per section/vendor
+    dedup_sets: Dict[Tuple[str, str], set] = {}
+
+    # --- occurrences state: (vendor, section or None for cover page) in document order ---
+    raw_occurrences: List[Tuple[str, Optional[str]]] = []
 
-    def ensure_section_key(sec: str) -> None:
-        if sec not in result:
-            result[sec] = {"Blis": [], "Vistar": []}
+    def finalize_question() -> None:
+        nonlocal question_section, captured_lines, lines_seen, capturing
+        if question_section is not None and question_section not in section_to_question:
+            section_to_question[question_section] = " ".join(captured_lines).strip()
+        question_section = None
+        captured_lines = []
+        lines_seen = set()
+        capturing = False
+
+    def capture_question_line(norm: str) -> None:
+        if norm and not _is_page_number_line(norm):
+            key = _norm_key(norm)
+            if key not in lines_seen:
+                captured_lines.append(norm)
+                lines_seen.add(key)
 
     def paragraph_text_dedup() -> str:
         """Return paragraph text with internal duplicate lines removed, keeping original order."""
@@ -245,98 +194,80 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
                 seen_keys.add(k)
         return "\n".join(out_lines).strip()
 
-    def normalize_para_for_dedup(t: str) -> str:
-        return " ".join(t.split()).strip().lower()
-
-    # Track dedup sets per section/vendor
-    dedup_sets: Dict[Tuple[str, str], set] = {}
-
     def add_para_if_contains_vendor(sec: str, text: str) -> None:
         if not text:
             return
-        has_blis = bool(BLIS_WORD_RE.search(text))
-        has_vistar = bool(VISTAR_WORD_RE.search(text))
-        if not (has_blis or has_vistar):
+        vendors = VENDOR_MATCHER.labels_in(text)
+        if not vendors:
             return
-        ensure_section_key(sec)
-        norm_key = normalize_para_for_dedup(text)
-        if has_blis:
-            key = (sec, "Blis")
-            dedup_sets.setdefault(key, set())
-            if norm_key not in dedup_sets[key]:
-                result[sec]["Blis"].append(text)
-                dedup_sets[key].add(norm_key)
-        if has_vistar:
-            key = (sec, "Vistar")
-            dedup_sets.setdefault(key, set())
-            if norm_key not in dedup_sets[key]:
-                result[sec]["Vistar"].append(text)
-                dedup_sets[key].add(norm_key)
-
-    def reset_paragraph_state() -> None:
-        nonlocal paragraph_lines, seen_line_keys_in_para, last_line_key
-        paragraph_lines = []
-        seen_line_keys_in_para = set()
-        last_line_key = None
+        norm_key = _norm_key(text)
+        for vendor in vendors:
+            seen = dedup_sets.setdefault((sec, vendor), set())
+            if norm_key not in seen:
+                result.setdefault(sec, {}).setdefault(vendor, []).append(text)
+                seen.add(norm_key)
 
     def finalize_paragraph() -> None:
+        nonlocal paragraph_lines, seen_line_keys_in_para, last_line_key
         if paragraph_lines and current_section and in_response:
-            text = paragraph_text_dedup()
-            add_para_if_contains_vendor(current_section, text)
-            reset_paragraph_state()
-
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            text = ""
+            add_para_if_contains_vendor(current_section, paragraph_text_dedup())
+            paragraph_lines = []
+            seen_line_keys_in_para = set()
+            last_line_key = None
+
+    for text in page_texts:
         for raw_line in text.splitlines():
-            line = raw_line.rstrip()
+            line = raw_line.strip()
 
-            # Section header?
-            m = SECTION_LINE_RE.match(line.strip())
+            # Section header: closes the open question and response block, moves all three scans on
+            m = SECTION_LINE_RE.match(line)
             if m:
-                # stop any ongoing response block at the boundary
+                if capturing:
+                    finalize_question()
                 if in_response:
                     finalize_paragraph()
                 in_response = False
                 current_section = m.group(1).strip()
+                question_section = current_section
+                captured_lines = []
+                lines_seen = set()
+                capturing = True
+                capture_question_line(_normalize_line_for_questions((m.group(2) or "").strip()))
                 continue
 
+            # 1) Questions
+            if capturing and question_section is not None:
+                if STOP_WORD_RE.match(line):
+                    finalize_question()
+                else:
+                    capture_question_line(_normalize_line_for_questions(line))
+
+            # 3) Occurrences (whole-word checks, one scan for every vendor)
+            for vendor in VENDOR_MATCHER.labels_in(line):
+                raw_occurrences.append((vendor, current_section))
+
+            # 2) Response paragraphs (ignore preface/cover)
             if current_section is None:
-                # ignore preface/cover for response capture
                 continue
-
-            # Response start line?
-            if RESPONSE_START_RE.match(line.strip()):
+            if RESPONSE_START_RE.match(line):
                 # starting a response block
                 finalize_paragraph()
                 in_response = True
                 continue
-
             if not in_response:
-                # outside response block -> ignore
                 continue
-
-            # inside response block
-            # boundaries & filters
             if _is_page_number_line(line):
-                # skip page markers
                 continue
-
-            # paragraph separators: blank lines or single-word headings
-            if not line.strip():
+            # paragraph separators: blank lines, single-word headings (e.g. "Comments", "Notes"), separators
+            if not line:
                 finalize_paragraph()
                 continue
-            if re.match(r'^[A-Za-z][A-Za-z ]*$', line.strip()) and len(line.strip().split()) == 1:
-                # a single word like "Comments", "Notes" acts as a separator between paragraphs
+            if re.match(r'^[A-Za-z][A-Za-z ]*$', line) and len(line.split()) == 1:
                 finalize_paragraph()
                 continue
             if _is_punctuation_only(line):
                 finalize_paragraph()
                 continue
-
             # accumulate line (keep bullets and formatting), with duplicate-line suppression
             norm_line = _normalize_line_for_response(line)
             key = _norm_key(norm_line)
@@ -346,77 +277,25 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
                 last_line_key = key
 
     # finalize at EOF
+    if capturing and question_section is not None:
+        finalize_question()
     if in_response:
         finalize_paragraph()
 
-    return result
-
-# ===== OCCURRENCE SCAN (vendor mentions + questions mapping) =====
-def parse_pdf_occurrences(pdf_path: str, section_to_question: Dict[str, str]) -> List[Tuple[str, str, str]]:
-    """ Second pass: scan PDF and return occurrences: [(vendor, found_in_display, question_text), ...]
-        Rules:
-        - Mentions before the first section -> Found in = "Cover Page", Questions = "Cover Page".
-        - Mentions within a section -> Found in = section number, Questions = section_to_question[section].
-        - Whole-word matches only for 'Blis' or 'Vistar'.
-    """
-    occurrences: List[Tuple[str, str, str]] = []
-    try:
-        reader = PdfReader(pdf_path)
-    except Exception as e:
-        warn(f"Failed to open PDF '{pdf_path}': {e}")
-        return occurrences
-
-    current_section_num: Optional[str] = None
-    first_section_seen: bool = False
-
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            continue
-        for raw_line in text.splitlines():
-            line = raw_line.strip()
-
-            # Section change?
-            m = SECTION_LINE_RE.match(line)
-            if m:
-                current_section_num = m.group(1).strip()
-                first_section_seen = True
-                continue
-
-            # Whole-word checks
-            has_blis = bool(BLIS_WORD_RE.search(line))
-            has_vistar = bool(VISTAR_WORD_RE.search(line))
-
-            if not first_section_seen:
-                # Cover Page mentions
-                if has_blis:
-                    occurrences.append(("Blis", "Cover Page", "Cover Page"))
-                if has_vistar:
-                    occurrences.append(("Vistar", "Cover Page", "Cover Page"))
-            else:
-                if current_section_num:
-                    qtext = section_to_question.get(current_section_num, "")
-                    if has_blis:
-                        occurrences.append(("Blis", current_section_num, qtext))
-                    if has_vistar:
-                        occurrences.append(("Vistar", current_section_num, qtext))
-    return occurrences
+    for vendor, section in raw_occurrences:
+        if section is None:
+            occurrences.append((vendor, "Cover Page", "Cover Page"))
+        else:
+            occurrences.append((vendor, section, section_to_question.get(section, "")))
+    return section_to_question, result, occurrences
 
 # ===== FILENAME VENDOR DETECTION =====
 def detect_vendors_in_filename(filename: str) -> List[str]:
     """ Detect vendor names present in the filename (case-insensitive).
-        Returns any of ['Blis', 'Vistar'].
+        Returns lexicon vendor names, in lexicon order.
         Only matches whole words, so 'published.pdf' will NOT match 'Blis'.
     """
-    lower = filename.lower()
-    vendors: List[str] = []
-    if re.search(r'\bblis\b', lower, flags=re.IGNORECASE):
-        vendors.append("Blis")
-    if re.search(r'\bvistar\b', lower, flags=re.IGNORECASE):
-        vendors.append("Vistar")
-    return vendors
+    return VENDOR_MATCHER.labels_in(filename)
 
 # ========= EXCEL IO =========
 def read_master() -> pd.DataFrame:
@@ -431,12 +310,12 @@ def ensure_extract_headers(master_columns: List[str]) -> pd.DataFrame:
         If sheet is missing or empty, initialize with master headers.
         Return current sheet as DataFrame (with at least master columns).
     """
-    if not os.path.exists(EXTRACT_PATH):
-        log(f"Creating new extract workbook at {EXTRACT_PATH}")
-        df_new = pd.DataFrame(columns=master_columns)
-        with pd.ExcelWriter(EXTRACT_PATH, engine="openpyxl", mode="w") as writer:
-            df_new.to_excel(writer, sheet_name=EXTRACT_SHEET, index=False)
-    df = pd.read_excel(EXTRACT_PATH, sheet_name=EXTRACT_SHEET, engine="openpyxl")
+    with workbook_session(EXTRACT_PATH) as book:
+        if not book.exists():
+            log(f"Creating new extract workbook at {EXTRACT_PATH}")
+            df_new = pd.DataFrame(columns=master_columns)
+            book.replace(EXTRACT_SHEET, df_new)
+        df = book.read(EXTRACT_SHEET)
     # Ensure all master columns exist
     for col in master_columns:
         if col not in df.columns:
@@ -499,24 +378,17 @@ def enforce_vendor_foundin_questions_response_source_at_PQRST(df: pd.DataFrame)
     return df
 
 def save_extract_df(df: pd.DataFrame) -> None:
-    with pd.ExcelWriter(EXTRACT_PATH, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-        df.to_excel(writer, sheet_name=EXTRACT_SHEET, index=False)
+    with workbook_session(EXTRACT_PATH) as book:
+        book.replace(EXTRACT_SHEET, df)
     log(f"Saved updates to {EXTRACT_PATH} (sheet '{EXTRACT_SHEET}')")
 
 # ========= FILE MATCHING =========
 def collect_pdf_matches(pdf_folder: str) -> Dict[str, List[str]]:
-    """ Walk the folder and return a mapping: normalized_id -> list of PDF paths.
+    """ Return a mapping: normalized_id -> list of PDF paths under the folder (recursive), from the shared PDF catalog.
         Only includes files whose name contains a trailing _<digits>.
     """
-    mapping: Dict[str, List[str]] = {}
-    for root, _, files in os.walk(pdf_folder):
-        for f in files:
-            if not f.lower().endswith(".pdf"):
-                continue
-            fullpath = os.path.join(root, f)
-            fid = extract_id_from_filename(f)
-            if fid:
-                mapping.setdefault(fid, []).append(fullpath)
+    with open_catalog(refresh=False) as catalog:
+        mapping = catalog.id_map(pdf_folder, recursive=True)
     log(f"Indexed {sum(len(v) for v in mapping.values())} PDF(s) across {len(mapping)} ID(s).")
     return mapping
 
@@ -551,6 +423,8 @@ def main() -> None:
     # Collect PDFs by ID
     id_to_pdfs = collect_pdf_matches(PDF_FOLDER)
 
+    # Rows are buffered column-wise and turned into one DataFrame at the end
+    sink = RowSink(extract_df.columns)
     rows_appended = 0
 
     # Process each ID
@@ -569,10 +443,9 @@ def main() -> None:
             for v in vendors_in_name:
                 occurrences.append((v, "Filename", base, "Filename", pd.NA))
 
-            # Content occurrences
-            section_q = extract_sections_questions(pdf_path)
-            response_map = extract_response_vendor_paragraphs(pdf_path)  # section -> {vendor: [paras...]}
-            raw_occ = parse_pdf_occurrences(pdf_path, section_q)          # List[(vendor, found_in, question)]
+            # Content occurrences: one pass builds section -> question, section -> {vendor: [paras...]}
+            # and List[(vendor, found_in, question)]
+            _, response_map, raw_occ = scan_pdf(pdf_path)
             seen_pairs = set()
             for v, fin, q in raw_occ:
                 key = (v, fin)
@@ -596,7 +469,7 @@ def main() -> None:
             new_row["Questions"] = "Not Applicable"
             new_row["SourceFileName"] = os.path.basename(pdfs[0]) if pdfs else pd.NA
             new_row["Response Keyword Found"] = pd.NA
-            extract_df = pd.concat([extract_df, pd.DataFrame([new_row])], ignore_index=True)
+            sink.append(new_row)
             rows_appended += 1
         else:
             # Add each occurrence as its own row
@@ -615,17 +488,21 @@ def main() -> None:
                     new_row["Response Keyword Found"] = response_text
                 new_row["SourceFileName"] = source_file
 
-                extract_df = pd.concat([extract_df, pd.DataFrame([new_row])], ignore_index=True)
+                sink.append(new_row)
                 rows_appended += 1
 
     # Save final result
+    extract_df = sink.to_frame()
     extract_df = enforce_vendor_foundin_questions_response_source_at_PQRST(extract_df)
     save_extract_df(extract_df)
+    write_dataset(extract_df, EXTRACT_SHEET, id_col=id_col_name)
     log(f"Appended {rows_appended} row(s) into '{EXTRACT_SHEET}'.")
     log("Completed.")
 
 if __name__ == "__main__":
     try:
-        main()
+        # Sheets are read once and written together when the session closes
+        with workbook_session(EXTRACT_PATH):
+            main()
     except Exception as e:
         warn(f"Script failed: {e}")
\ No newline at end of file
@@ -1,6 +1,7 @@
 
 #!/usr/bin/env python
 from openpyxl import load_workbook
+from master_store import composite_indices, normalize, open_store, row_combo
 
 EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
 MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & CyberSecurity\Privacy\PIA Files\T-Ads PIAs Automation\Master.xlsx"
@@ -11,93 +12,81 @@ DST_SHEET_1 = "Master"
 SRC_SHEET_2 = "ID to PD Mapping"
 DST_SHEET_2 = "Keyword to ID mapped"
 
-COMPOSITE_HEADERS = ["ID", "Keywords", "Category", "Type of Identifier"]
-
-def get_header_map(ws):
-    headers = [str(cell.value).strip() if cell.value else "" for cell in ws[1]]
-    return {h.lower(): idx for idx, h in enumerate(headers)}
-
-def normalize(val):
-    return str(val).strip().lower() if val else ""
-
-def get_existing_ids(ws):
-    ids = set()
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row and row[0]:
-            ids.add(normalize(row[0]))
-    return ids
-
-def get_existing_combos(ws, header_map):
-    indices = [header_map[h.lower()] for h in COMPOSITE_HEADERS if h.lower() in header_map]
-    combos = set()
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if not row:
-            continue
-        values = [normalize(row[idx]) if idx < len(row) else "" for idx in indices]
-        combos.add(tuple(values))
-    return combos
-
-def copy_rows_master(src_ws, dst_ws, existing_ids):
-    rows_copied = 0
+def select_rows_master(src_ws, store):
+    """Source rows to append to the Master sheet (new IDs only, looked up in the store's ID index)."""
+    rows_to_copy = []
+    added_ids = set()
     for row in src_ws.iter_rows(min_row=2, values_only=True):
         if not row or not any(row):
             continue
         id_val = normalize(row[0])
-        if id_val and id_val not in existing_ids:
-            dst_ws.append(row)
-            existing_ids.add(id_val)
-            rows_copied += 1
+        if id_val and id_val not in added_ids and not store.has_id(DST_SHEET_1, id_val):
+            rows_to_copy.append(row)
+            added_ids.add(id_val)
             print(f"[COPIED Master] ID={id_val}")
         else:
             print(f"[SKIPPED Master] ID={id_val} (duplicate)")
-    return rows_copied
+    return rows_to_copy
 
-def copy_rows_keyword_mapping(src_ws, dst_ws, existing_combos, header_map):
-    rows_copied = 0
+def select_rows_keyword_mapping(src_ws, store):
+    """Source rows to append to the keyword mapping sheet (new composite keys only, looked up in the store)."""
+    rows_to_copy = []
+    added_combos = set()
     skipped_due_to_duplicate = 0
-    indices = [header_map[h.lower()] for h in COMPOSITE_HEADERS if h.lower() in header_map]
+    # Composite key columns as laid out in the destination sheet
+    indices = composite_indices(store.header(DST_SHEET_2))
     for row_num, row in enumerate(src_ws.iter_rows(min_row=2, values_only=True), start=2):
         if not row or not any(row):
             print(f"[SKIPPED Row {row_num}] Empty row")
             continue
-        values = [normalize(row[idx]) if idx < len(row) else "" for idx in indices]
-        combo = tuple(values)
-        if combo not in existing_combos:
-            dst_ws.append(row)
-            existing_combos.add(combo)
-            rows_copied += 1
+        combo = row_combo(row, indices)
+        if combo not in added_combos and not store.has_combo(DST_SHEET_2, combo):
+            rows_to_copy.append(row)
+            added_combos.add(combo)
             print(f"[COPIED Mapping] Row {row_num} Composite Key={combo}")
         else:
             skipped_due_to_duplicate += 1
             print(f"[SKIPPED Mapping] Row {row_num} Duplicate Composite Key={combo}")
     print(f"Skipped {skipped_due_to_duplicate} rows due to duplicate composite keys.")
-    return rows_copied
+    return rows_to_copy
 
 def main():
-    src_wb = load_workbook(EXTRACT_PATH, data_only=True)
-    dst_wb = load_workbook(MASTER_PATH)
-
-    src_ws1 = src_wb[SRC_SHEET_1]
-    src_ws2 = src_wb[SRC_SHEET_2]
-    dst_ws1 = dst_wb[DST_SHEET_1]
-    dst_ws2 = dst_wb[DST_SHEET_2]
-
-    header_map_dst2 = get_header_map(dst_ws2)
-
-    existing_ids = get_existing_ids(dst_ws1)
-    existing_combos = get_existing_combos(dst_ws2, header_map_dst2)
-
-    print("\n--- Copying Raw Extract → Master ---")
-    rows_copied_1 = copy_rows_master(src_ws1, dst_ws1, existing_ids)
-
-    print("\n--- Copying ID to PD Mapping → Keyword to ID mapped ---")
-    rows_copied_2 = copy_rows_keyword_mapping(src_ws2, dst_ws2, existing_combos, header_map_dst2)
-
-    dst_wb.save(MASTER_PATH)
+    with open_store(MASTER_PATH) as store:
+        # Phase 1: stream the Extract sheets and check each row against the store's indexes
+        src_wb = load_workbook(EXTRACT_PATH, read_only=True, data_only=True)
+        try:
+            src_ws1 = src_wb[SRC_SHEET_1]
+            src_ws2 = src_wb[SRC_SHEET_2]
+            for ws in (src_ws1, src_ws2):
+                ws.reset_dimensions()  # scan every stored row, whatever size the file declares
+
+            print("\n--- Copying Raw Extract → Master ---")
+            rows_master = select_rows_master(src_ws1, store)
+
+            print("\n--- Copying ID to PD Mapping → Keyword to ID mapped ---")
+            rows_mapping = select_rows_keyword_mapping(src_ws2, store)
+        finally:
+            src_wb.close()
+
+        # Phase 2: open the Master for writing only when there is something to add
+        if rows_master or rows_mapping:
+            dst_wb = load_workbook(MASTER_PATH)
+            appended = {}
+            for dst_sheet, rows in ((DST_SHEET_1, rows_master), (DST_SHEET_2, rows_mapping)):
+                dst_ws = dst_wb[dst_sheet]
+                for row in rows:
+                    dst_ws.append(row)
+                first_row = dst_ws.max_row - len(rows) + 1
+                appended[dst_sheet] = {first_row + i: row for i, row in enumerate(rows)}
+            dst_wb.save(MASTER_PATH)
+            for dst_sheet, rows in appended.items():
+                store.put_rows(dst_sheet, rows)
+        else:
+            print("\nNo new rows; Master left unchanged.")
 
     print("\n--- Summary ---")
-    print(f"Rows copied to '{DST_SHEET_1}': {rows_copied_1}")
-    print(f"Rows copied to '{DST_SHEET_2}': {rows_copied_2}")
+    print(f"Rows copied to '{DST_SHEET_1}': {len(rows_master)}")
+    print(f"Rows copied to '{DST_SHEET_2}': {len(rows_mapping)}")
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
-
 #!/usr/bin/env python
+from collections import defaultdict, deque
+
 from openpyxl import load_workbook
+from master_store import normalize, open_store
 
 EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
 MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & CyberSecurity\Privacy\PIA Files\T-Ads PIAs Automation\Master.xlsx"
@@ -8,48 +10,162 @@ MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & Cybe
 VENDOR_SRC_SHEET = "Vendor Extraction"
 VENDOR_DST_SHEET = "Vendor Details"
 
+# A Vendor Details row is matched to the Vendor Extraction row with the same values in these columns
+KEY_HEADERS = ["ID", "Vendor", "Found in", "SourceFileName"]
+
+
+def _trimmed(row):
+    """Row values with trailing empty cells dropped, for comparing rows."""
+    row = list(row)
+    while row and row[-1] in (None, ""):
+        row.pop()
+    return row
+
+
+def _trimmed_rows(rows):
+    """Rows with trailing empty cells and trailing empty rows dropped, for comparing sheet contents."""
+    trimmed = [_trimmed(row) for row in rows]
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+    return trimmed
+
+
+def _key_indices(header):
+    """Positions of KEY_HEADERS in the source header (empty if one is missing: whole rows are the key)."""
+    header_map = {normalize(h): idx for idx, h in enumerate(header)}
+    indices = [header_map.get(h.lower()) for h in KEY_HEADERS]
+    return [] if None in indices else indices
+
+
+def _row_key(row, indices):
+    if not indices:
+        return tuple(normalize(v) for v in _trimmed(row))
+    return tuple(normalize(row[idx]) if idx < len(row) else "" for idx in indices)
+
+
+def plan_delta(dst_rows, src_rows, indices):
+    """
+    Match destination rows to source rows by key (repeated keys pair up in order) and lay out the
+    new destination rows with as few rows moving as possible: changed rows are rewritten in place,
+    new rows fill the places of removed rows before being appended, and places still empty are
+    filled with the last rows. Returns (final rows, {"updated", "inserted", "removed", "unchanged"}).
+    """
+    positions = defaultdict(deque)
+    for pos, row in enumerate(dst_rows):
+        positions[_row_key(row, indices)].append(pos)
+
+    final = list(dst_rows)
+    counts = {"updated": 0, "inserted": 0, "removed": 0, "unchanged": 0}
+    inserts = []
+    for row in src_rows:
+        matches = positions.get(_row_key(row, indices))
+        if not matches:
+            inserts.append(row)
+            continue
+        pos = matches.popleft()
+        if _trimmed(final[pos]) == _trimmed(row):
+            counts["unchanged"] += 1
+        else:
+            final[pos] = row
+            counts["updated"] += 1
+
+    # Destination rows left unmatched are removed
+    holes = sorted(pos for matches in positions.values() for pos in matches)
+    counts["removed"] = len(holes)
+    counts["inserted"] = len(inserts)
+    for pos in holes:
+        final[pos] = None
+
+    # New rows take the places of removed rows first, the rest go at the end
+    for pos, row in zip(holes, inserts):
+        final[pos] = row
+    final.extend(inserts[len(holes):])
+
+    # Places still empty get the last rows; the tail is dropped
+    for pos in holes[len(inserts):]:
+        while final and final[-1] is None:
+            final.pop()
+        if pos >= len(final):
+            break
+        final[pos] = final.pop()
+    while final and final[-1] is None:
+        final.pop()
+    return final, counts
+
 
 def copy_vendor_details():
-    # Load workbooks
     try:
-        src_wb = load_workbook(EXTRACT_PATH, data_only=True)
+        store = open_store(MASTER_PATH)
     except Exception as e:
-        print(f"[ERROR] Unable to open Extract file: {EXTRACT_PATH}\n{e}")
+        print(f"[ERROR] Unable to open Master file: {MASTER_PATH}\n{e}")
         return
+    with store:
+        _copy_vendor_details(store)
+
 
+def _copy_vendor_details(store):
+    # Phase 1: read the source rows with a streaming (read-only) reader; the current destination rows come from the store
     try:
-        dst_wb = load_workbook(MASTER_PATH)
+        src_wb = load_workbook(EXTRACT_PATH, read_only=True, data_only=True)
     except Exception as e:
-        print(f"[ERROR] Unable to open Master file: {MASTER_PATH}\n{e}")
+        print(f"[ERROR] Unable to open Extract file: {EXTRACT_PATH}\n{e}")
         return
 
-    # Validate source sheet exists
-    if VENDOR_SRC_SHEET not in src_wb.sheetnames:
-        print(f"[ERROR] Source sheet '{VENDOR_SRC_SHEET}' not found in Extract file.")
+    try:
+        # Validate source sheet exists
+        if VENDOR_SRC_SHEET not in src_wb.sheetnames:
+            print(f"[ERROR] Source sheet '{VENDOR_SRC_SHEET}' not found in Extract file.")
+            return
+
+        src_ws = src_wb[VENDOR_SRC_SHEET]
+        src_ws.reset_dimensions()
+        src_rows = list(src_ws.iter_rows(values_only=True))
+        # Read source header to support consistent data copy
+        src_header = list(src_rows[0]) if src_rows else [None]
+        data_rows = _trimmed_rows(src_rows[1:])
+    finally:
+        src_wb.close()
+
+    # Work out the keyed delta against the current destination rows
+    created = not store.has_sheet(VENDOR_DST_SHEET)
+    dst_rows = [] if created else _trimmed_rows(store.rows(VENDOR_DST_SHEET, min_row=2))
+    final_rows, counts = plan_delta(dst_rows, data_rows, _key_indices(src_header))
+    summary = (f"{counts['updated']} updated, {counts['inserted']} inserted, "
+               f"{counts['removed']} removed, {counts['unchanged']} unchanged")
+
+    if not created and _trimmed_rows(final_rows) == dst_rows:
+        print(f"[SUCCESS] '{VENDOR_DST_SHEET}' already matches the {len(data_rows)} data rows "
+              f"of '{VENDOR_SRC_SHEET}' ({summary}). Master left unchanged.")
         return
 
-    src_ws = src_wb[VENDOR_SRC_SHEET]
+    # Phase 2: open the Master for writing and rewrite only the rows that differ
+    try:
+        dst_wb = load_workbook(MASTER_PATH)
+    except Exception as e:
+        print(f"[ERROR] Unable to open Master file: {MASTER_PATH}\n{e}")
+        return
 
     # Prepare destination sheet
-    if VENDOR_DST_SHEET in dst_wb.sheetnames:
+    if not created:
         dst_ws = dst_wb[VENDOR_DST_SHEET]
-        # If there are any rows beyond the header, delete them (preserve headers in row 1)
-        if dst_ws.max_row >= 2:
-            dst_ws.delete_rows(2, dst_ws.max_row - 1)
     else:
         dst_ws = dst_wb.create_sheet(title=VENDOR_DST_SHEET)
         # If we create a new sheet, write the header from the source
-        src_header = [cell.value for cell in next(src_ws.iter_rows(min_row=1, max_row=1))]
         dst_ws.append(src_header)
 
-    # Read source header to support consistent data copy
-    src_header = [cell.value for cell in next(src_ws.iter_rows(min_row=1, max_row=1))]
-
-    # Copy only data rows (starting from row 2 in source)
-    rows_copied = 0
-    for row in src_ws.iter_rows(min_row=2, values_only=True):
-        dst_ws.append(row)
-        rows_copied += 1
+    rows_written = 0
+    for pos, row in enumerate(final_rows):
+        old = dst_rows[pos] if pos < len(dst_rows) else []
+        if pos < len(dst_rows) and _trimmed(row) == old:
+            continue
+        row = list(row)
+        for col in range(1, max(len(row), len(old)) + 1):
+            # (assign .value: ws.cell(..., value=None) would leave an old value in place)
+            dst_ws.cell(row=pos + 2, column=col).value = row[col - 1] if col <= len(row) else None
+        rows_written += 1
+    # Rows past the new end (removed, nothing moved into them)
+    if dst_ws.max_row > len(final_rows) + 1:
+        dst_ws.delete_rows(len(final_rows) + 2, dst_ws.max_row - len(final_rows) - 1)
 
     # Save changes
     try:
@@ -57,9 +173,12 @@ def copy_vendor_details():
     except Exception as e:
         print(f"[ERROR] Unable to save Master file: {MASTER_PATH}\n{e}")
         return
+    if created:
+        store.put_rows(VENDOR_DST_SHEET, {1: src_header})
+    store.replace_rows(VENDOR_DST_SHEET, final_rows)
 
-    print(f"[SUCCESS] Cleared existing rows from 2 onward and copied {rows_copied} data rows "
-          f"from '{VENDOR_SRC_SHEET}' to '{VENDOR_DST_SHEET}'. Headers preserved.")
+    print(f"[SUCCESS] Synced '{VENDOR_DST_SHEET}' with '{VENDOR_SRC_SHEET}' by "
+          f"{', '.join(KEY_HEADERS)}: {summary}; {rows_written} row(s) written. Headers preserved.")
 
 
 def main():
@@ -1,12 +1,13 @@
 
 
 import os
-import re
-import shutil
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict
 from urllib.parse import quote
 from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
+from master_store import MasterStore, open_store
+from pdf_catalog import FilenameResolver, open_catalog
+from pdf_publisher import publish_pdfs
 
 # =========================
 # Configurations
@@ -40,22 +41,71 @@ def normalize_cell_value(val) -> str:
     """Trimmed string for general use (internal spaces preserved)."""
     return str(val).strip() if val else ""
 
-def last_data_row_in_col_a(ws: Worksheet) -> int:
+class SheetSnapshot:
+    """
+    Cell values of one sheet, read from the Master store. Writes are recorded instead of applied,
+    so the decisions run without loading the workbook; apply_to() replays them.
+    """
+
+    def __init__(self, rows: List[tuple], exists: bool = True):
+        self.rows = [list(r) for r in rows]
+        self.exists = exists
+        self.writes: Dict[Tuple[int, int], Tuple[object, bool]] = {}  # (row, column) -> (value, hyperlink)
+        self._max_row = max(len(self.rows), 1)
+
+    @classmethod
+    def read(cls, store: MasterStore, sheet_name: str, max_col: int) -> "SheetSnapshot":
+        """Columns 1..max_col of a stored sheet (empty if the sheet is missing)."""
+        if not store.has_sheet(sheet_name):
+            return cls([], exists=False)
+        return cls(store.rows(sheet_name, max_col=max_col))
+
+    @property
+    def max_row(self) -> int:
+        return self._max_row
+
+    def original(self, row: int, column: int):
+        if row <= len(self.rows) and column <= len(self.rows[row - 1]):
+            return self.rows[row - 1][column - 1]
+        return None
+
+    def value(self, row: int, column: int):
+        if (row, column) in self.writes:
+            return self.writes[(row, column)][0]
+        return self.original(row, column)
+
+    def iter_rows(self, min_row: int = 2):
+        """(row number, values) for the stored rows from min_row on, as read (recorded writes not applied)."""
+        for row_idx in range(min_row, len(self.rows) + 1):
+            yield row_idx, self.rows[row_idx - 1]
+
+    def set(self, row: int, column: int, value, hyperlink: bool = False) -> None:
+        self.writes[(row, column)] = (value, hyperlink)
+        self._max_row = max(self._max_row, row)
+
+    def changed(self) -> bool:
+        """True if applying the writes would change any cell value (or create the sheet)."""
+        if not self.exists:
+            return True
+        return any(
+            (value if value is not None else "") != (self.original(row, column) if self.original(row, column) is not None else "")
+            for (row, column), (value, _) in self.writes.items()
+        )
+
+    def apply_to(self, ws: Worksheet) -> None:
+        for (row, column), (value, hyperlink) in self.writes.items():
+            cell = ws.cell(row=row, column=column, value=value)
+            if hyperlink:
+                cell.hyperlink = value
+                cell.style = "Hyperlink"
+
+def last_data_row_in_col_a(ws: SheetSnapshot) -> int:
     """Find the last non-empty row in column A."""
     for row in range(ws.max_row, 1, -1):
-        if normalize_cell_value(ws.cell(row=row, column=1).value):
+        if normalize_cell_value(ws.value(row, 1)):
             return row
     return 1
 
-def get_existing_ids_strict(ws: Worksheet) -> set:
-    """Collect existing IDs (column A) in a case-insensitive set."""
-    ids = set()
-    for row in range(2, ws.max_row + 1):
-        val = normalize_cell_value(ws.cell(row=row, column=1).value)
-        if val:
-            ids.add(val.lower())
-    return ids
-
 def encode_filename_for_url(filename: str) -> str:
     """
     Encode ONLY the filename for inclusion in a URL path segment.
@@ -74,122 +124,73 @@ def build_sharepoint_file_url(base_url: str, filename: str) -> str:
     return url
 
 # =========================
-# ID ↔ Filename mapping from DEST_DIR
+# ID ↔ Filename resolution from DEST_DIR
 # =========================
-# Matches ..._{ID}.pdf OR ...  _{ID}.pdf (optional space before underscore), case-insensitive
-ID_SUFFIX_PATTERN = re.compile(r"(?:\s)?_(\d+)\.pdf$", re.IGNORECASE)
-
-def scan_dest_dir_for_id_map(dest_dir: str) -> Dict[str, List[str]]:
+def build_dest_resolver(dest_dir: str) -> FilenameResolver:
     """
-    Scan dest_dir for PDFs; build a map: id_lower -> [filenames].
-    Matches filenames that end with ' _{ID}.pdf' or '_{ID}.pdf', case-insensitive.
+    Index the PDFs in dest_dir from the shared PDF catalog (files ending with ' _{ID}.pdf' or '_{ID}.pdf').
+    When several files share an ID, the resolver picks the one whose prefix best matches Column B.
     """
-    id_map: Dict[str, List[str]] = {}
     if not os.path.isdir(dest_dir):
         print(f"[WARN] DEST_DIR not found: {dest_dir}", flush=True)
-        return id_map
-
-    for f in os.listdir(dest_dir):
-        fl = f.lower()
-        if not fl.endswith(".pdf"):
-            continue
-        m = ID_SUFFIX_PATTERN.search(f)
-        if m:
-            id_val = m.group(1).lower()
-            id_map.setdefault(id_val, []).append(f)
+        return FilenameResolver([])
 
-    print(f"[INFO] Scanned DEST_DIR: found {sum(len(v) for v in id_map.values())} PDF(s) with ID suffix", flush=True)
-    return id_map
+    with open_catalog(refresh=False) as catalog:
+        resolver = catalog.resolver(dest_dir)
 
-def choose_best_filename(candidates: List[str], name_hint: Optional[str]) -> str:
-    """
-    If multiple files share the same ID, pick the one whose prefix best matches name_hint (Column B),
-    otherwise return a deterministic first (sorted).
-    """
-    if not candidates:
-        raise ValueError("No candidates to choose from.")
-    if len(candidates) == 1 or not name_hint:
-        return sorted(candidates)[0]
-
-    def norm(s: str) -> str:
-        return s.lower().replace('/', '_').replace('\\', '_').strip()
-
-    hint = norm(name_hint)
-    best = None
-    best_score = -1
-    for f in candidates:
-        # prefix before the last underscore + ID (allow for optional space)
-        fl = f.lower()
-        pos = fl.rfind("_")
-        prefix = f[:pos].rstrip()
-        pf = norm(prefix)
-        score = 0
-        if pf == hint:
-            score = 3
-        elif pf.startswith(hint) or hint.startswith(pf):
-            score = 2
-        elif hint in pf or pf in hint:
-            score = 1
-        if score > best_score:
-            best = f
-            best_score = score
-    return best or sorted(candidates)[0]
+    print(f"[INFO] Scanned DEST_DIR: found {len(resolver)} PDF(s) with ID suffix", flush=True)
+    return resolver
 
 # =========================
 # Part 1: Copy PDFs
 # =========================
 def copy_pdfs(source_dir: str, dest_dir: str, recursive: bool = True) -> Tuple[int, int, int]:
     """
-    Copies all .pdf files from source_dir to dest_dir.
-    Returns (new_files_count, overwritten_files_count, total_files_in_dest).
+    Publishes the .pdf files from source_dir to dest_dir, copying only files that are new or whose
+    content changed (see pdf_publisher), so OneDrive does not re-upload the whole archive.
+    Returns (new_files_count, updated_files_count, total_files_in_dest).
     """
-    if not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
-
-    new_files_count = 0
-    overwritten_files_count = 0
-
-    for root, dirs, files in os.walk(source_dir):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                src_path = os.path.join(root, file)
-                dest_path = os.path.join(dest_dir, file)
-
-                if os.path.exists(dest_path):
-                    # File exists → overwrite
-                    shutil.copy2(src_path, dest_path)
-                    overwritten_files_count += 1
-                else:
-                    # File is new → copy
-                    shutil.copy2(src_path, dest_path)
-                    new_files_count += 1
-
-        if not recursive:
-            break
-
-    # Total files in destination after operation
-    total_files_in_dest = len([f for f in os.listdir(dest_dir) if f.lower().endswith(".pdf")])
+    result = publish_pdfs(source_dir, dest_dir, recursive=recursive)
+    megabytes = result.bytes_copied / (1024 * 1024)
 
-    print(f"[INFO] New PDFs copied: {new_files_count}", flush=True)
-    print(f"[INFO] PDFs overwritten: {overwritten_files_count}", flush=True)
-    print(f"[INFO] Total PDFs in destination folder: {total_files_in_dest}", flush=True)
+    print(f"[INFO] New PDFs copied: {result.new}", flush=True)
+    print(f"[INFO] PDFs updated (content changed): {result.updated}", flush=True)
+    print(f"[INFO] PDFs unchanged (not copied): {result.unchanged}", flush=True)
+    print(f"[INFO] Copied {megabytes:.1f} MB in {result.seconds:.1f}s "
+          f"({megabytes / result.seconds if result.seconds else 0:.1f} MB/s)", flush=True)
+    print(f"[INFO] Total PDFs in destination folder: {result.total_in_dest}", flush=True)
 
-    return new_files_count, overwritten_files_count, total_files_in_dest
+    return result.new, result.updated, result.total_in_dest
 
 # =========================
 # Part 2: Excel Processing
 # =========================
-def collect_rows_from_master(master_sheet: Worksheet) -> List[Tuple[str, str]]:
+def _cell(row: list, column: int):
+    return row[column - 1] if column <= len(row) else None
+
+def collect_rows_from_master(master_sheet: SheetSnapshot) -> List[Tuple[str, str]]:
     """Collect (Column A, Column B) pairs from the Master sheet, skipping blanks."""
     rows: List[Tuple[str, str]] = []
-    for row_idx in range(2, master_sheet.max_row + 1):
-        a_val = normalize_cell_value(master_sheet.cell(row=row_idx, column=1).value)  # ID
-        b_val = normalize_cell_value(master_sheet.cell(row=row_idx, column=2).value)  # Name/prefix (trimmed)
+    for _, row in master_sheet.iter_rows():
+        a_val = normalize_cell_value(_cell(row, 1))  # ID
+        b_val = normalize_cell_value(_cell(row, 2))  # Name/prefix (trimmed)
         if a_val and b_val:
             rows.append((a_val, b_val))
     print(f"[INFO] Master rows collected: {len(rows)}", flush=True)
     return rows
 
+def index_master_by_id(master_sheet: SheetSnapshot) -> Dict[str, Tuple[str, str]]:
+    """
+    One pass over the Master sheet: id_lower -> (Column B as stored, Description from Column J).
+    The first row of a repeated ID wins, as in copy_unique_rows.
+    """
+    by_id: Dict[str, Tuple[str, str]] = {}
+    for _, row in master_sheet.iter_rows():
+        a_val = normalize_cell_value(_cell(row, 1))
+        if a_val and a_val.lower() not in by_id:
+            by_id[a_val.lower()] = (str(_cell(row, 2) or ""), normalize_cell_value(_cell(row, 10)))
+    return by_id
+
 def ensure_sheet(workbook, sheet_name: str) -> Worksheet:
     """Return existing sheet or create it if missing."""
     if sheet_name in workbook.sheetnames:
@@ -197,26 +198,28 @@ def ensure_sheet(workbook, sheet_name: str) -> Worksheet:
     else:
         return workbook.create_sheet(title=sheet_name)
 
-def ensure_headers(link_ws: Worksheet, master_ws: Worksheet) -> None:
+def ensure_headers(link_ws: SheetSnapshot, master_ws: SheetSnapshot) -> None:
     """Ensure the link sheet has headers in columns A–D."""
-    col1_header = normalize_cell_value(link_ws.cell(row=1, column=1).value)
-    col2_header = normalize_cell_value(link_ws.cell(row=1, column=2).value)
-    master_col1_header = normalize_cell_value(master_ws.cell(row=1, column=1).value) or "Column 1"
-    master_col2_header = normalize_cell_value(master_ws.cell(row=1, column=2).value) or "Column 2"
+    col1_header = normalize_cell_value(link_ws.value(1, 1))
+    col2_header = normalize_cell_value(link_ws.value(1, 2))
+    master_col1_header = normalize_cell_value(master_ws.value(1, 1)) or "Column 1"
+    master_col2_header = normalize_cell_value(master_ws.value(1, 2)) or "Column 2"
     if not col1_header:
-        link_ws.cell(row=1, column=1, value=master_col1_header)
+        link_ws.set(1, 1, master_col1_header)
     if not col2_header:
-        link_ws.cell(row=1, column=2, value=master_col2_header)
+        link_ws.set(1, 2, master_col2_header)
 
-    if normalize_cell_value(link_ws.cell(row=1, column=3).value) != "Description":
-        link_ws.cell(row=1, column=3, value="Description")
-    if normalize_cell_value(link_ws.cell(row=1, column=4).value) != "hyperlink address":
-        link_ws.cell(row=1, column=4, value="hyperlink address")
+    if normalize_cell_value(link_ws.value(1, 3)) != "Description":
+        link_ws.set(1, 3, "Description")
+    if normalize_cell_value(link_ws.value(1, 4)) != "hyperlink address":
+        link_ws.set(1, 4, "hyperlink address")
 
-def copy_unique_rows(master_ws: Worksheet, link_ws: Worksheet) -> int:
-    """Append unique rows from Master (based on Column A ID, case-insensitive) into the Link sheet."""
+def copy_unique_rows(master_ws: SheetSnapshot, link_ws: SheetSnapshot, existing_ids: set) -> int:
+    """
+    Append unique rows from Master (based on Column A ID, case-insensitive) into the Link sheet.
+    existing_ids: lower-cased IDs already in the Link sheet (from the store's ID index).
+    """
     master_rows = collect_rows_from_master(master_ws)
-    existing_ids = get_existing_ids_strict(link_ws)
     start_row = last_data_row_in_col_a(link_ws) + 1
     appended = 0
 
@@ -224,8 +227,8 @@ def copy_unique_rows(master_ws: Worksheet, link_ws: Worksheet) -> int:
         key = a_val.lower()
         if key in existing_ids:
             continue
-        link_ws.cell(row=start_row, column=1, value=a_val)
-        link_ws.cell(row=start_row, column=2, value=b_val)
+        link_ws.set(start_row, 1, a_val)
+        link_ws.set(start_row, 2, b_val)
         start_row += 1
         appended += 1
         existing_ids.add(key)
@@ -233,37 +236,50 @@ def copy_unique_rows(master_ws: Worksheet, link_ws: Worksheet) -> int:
     print(f"[INFO] Unique rows appended to '{LINK_SHEET_NAME}': {appended}", flush=True)
     return appended
 
-def update_description_and_links(master_ws: Worksheet, link_ws: Worksheet, dest_dir: str) -> int:
+def set_if_changed(ws: SheetSnapshot, row: int, column: int, value, hyperlink: bool = False) -> bool:
+    """Record a write only if the cell does not already hold `value` (empty and None count as equal)."""
+    current = ws.value(row, column)
+    if (current if current is not None else "") == (value if value is not None else ""):
+        return False
+    ws.set(row, column, value, hyperlink=hyperlink)
+    return True
+
+def update_description_and_links(master_ws: SheetSnapshot, link_ws: SheetSnapshot, dest_dir: str) -> int:
     """
     For each populated row in the Link sheet:
-      - Column 3: Description from Master (Column J) using the same row index.
+      - Column 3: Description from the Master row with the same ID (Column J).
       - Column 4: Hyperlink address using SharePoint URL; filename chosen by matching ID at the end.
+    A row's cells are only rewritten when its description or resolved file (hence URL) changed.
+    Returns the number of rows touched.
     """
     last_row = last_data_row_in_col_a(link_ws)
-    count = 0
+    checked = touched = descriptions_changed = links_changed = 0
 
-    # Build ID -> [filenames] map from DEST_DIR (once)
-    id_map = scan_dest_dir_for_id_map(dest_dir)
+    # Build the DEST_DIR filename resolver and ID -> Master row (once each)
+    resolver = build_dest_resolver(dest_dir)
+    master_by_id = index_master_by_id(master_ws)
 
     for row_idx in range(2, last_row + 1):
-        a_val = normalize_cell_value(link_ws.cell(row=row_idx, column=1).value)  # ID
-        b_val = normalize_cell_value(link_ws.cell(row=row_idx, column=2).value)  # Name/prefix (trimmed)
+        a_val = normalize_cell_value(link_ws.value(row_idx, 1))  # ID
+        b_val = normalize_cell_value(link_ws.value(row_idx, 2))  # Name/prefix (trimmed)
         if not (a_val and b_val):
             continue
+        checked += 1
+
+        # Master row with this ID (rows not in Master keep their own Column B and get no Description)
+        b_raw, description = master_by_id.get(a_val.lower(), (str(link_ws.value(row_idx, 2) or ""), ""))
 
         # Column 3: Description from Master (Column J)
-        description = normalize_cell_value(master_ws.cell(row=row_idx, column=10).value)
-        link_ws.cell(row=row_idx, column=3, value=description)
+        description_changed = set_if_changed(link_ws, row_idx, 3, description)
 
         # Choose filename by ID match from DEST_DIR; if multiple, prefer best match to b_val
-        candidates = id_map.get(a_val.lower(), [])
-        if candidates:
-            file_name = choose_best_filename(candidates, b_val)
+        match = resolver.resolve(a_val, b_val)
+        if match:
+            file_name = os.path.basename(match)
             src = "dest-match"
         else:
             # Fallback filename:
             # Do NOT force a space; add a space only if Column B in Master ends with a space
-            b_raw = str(master_ws.cell(row=row_idx, column=2).value or "")
             safe_prefix = b_raw.replace('/', '_').replace('\\', '_')
             sep = " _" if b_raw.endswith(" ") else "_"
             file_name = f"{safe_prefix}{sep}{a_val}.pdf"
@@ -273,49 +289,57 @@ def update_description_and_links(master_ws: Worksheet, link_ws: Worksheet, dest_
         address = build_sharepoint_file_url(SHAREPOINT_BASE_URL, file_name)
 
         # Write hyperlink address visibly and set the cell hyperlink
-        addr_cell = link_ws.cell(row=row_idx, column=4, value=address)
-        addr_cell.hyperlink = address
-        addr_cell.style = "Hyperlink"
+        link_changed = set_if_changed(link_ws, row_idx, 4, address, hyperlink=True)
 
-        print(f"[ROW {row_idx}] ID={a_val} | source={src} | file='{file_name}' | url='{address}'", flush=True)
-        count += 1
+        if description_changed or link_changed:
+            touched += 1
+            descriptions_changed += description_changed
+            links_changed += link_changed
+            print(f"[ROW {row_idx}] ID={a_val} | source={src} | file='{file_name}' | url='{address}'", flush=True)
 
-    print(f"[INFO] Updated Description and hyperlink address: {count}", flush=True)
-    return count
+    print(f"[INFO] Link rows checked: {checked}; rows touched: {touched} "
+          f"(description changed: {descriptions_changed}, hyperlink changed: {links_changed})", flush=True)
+    return touched
 
 def process_master_excel(master_path: str, dest_dir: str) -> None:
     """Main Excel processing entry."""
     if not os.path.exists(master_path):
         raise FileNotFoundError(f"Master Excel not found: {master_path}")
 
-    wb = load_workbook(master_path)
-    if MASTER_SHEET_NAME not in wb.sheetnames:
-        raise ValueError(f"Sheet '{MASTER_SHEET_NAME}' not found in {master_path}")
+    with open_store(master_path) as store:
+        # Phase 1: read the two sheets from the Master store and work out every cell to write
+        if not store.has_sheet(MASTER_SHEET_NAME):
+            raise ValueError(f"Sheet '{MASTER_SHEET_NAME}' not found in {master_path}")
+        master_ws = SheetSnapshot.read(store, MASTER_SHEET_NAME, max_col=10)  # ID, Name ... Description (J)
+        link_ws = SheetSnapshot.read(store, LINK_SHEET_NAME, max_col=4)
+
+        ensure_headers(link_ws, master_ws)
+        copy_unique_rows(master_ws, link_ws, store.ids(LINK_SHEET_NAME))
+        update_description_and_links(master_ws, link_ws, dest_dir)
 
-    master_ws = wb[MASTER_SHEET_NAME]
-    link_ws = ensure_sheet(wb, LINK_SHEET_NAME)
+        # Phase 2: open the workbook for writing only if a cell actually changes
+        if not link_ws.changed():
+            print(f"[INFO] '{LINK_SHEET_NAME}' already up to date; {master_path} left unchanged.", flush=True)
+            return
 
-    ensure_headers(link_ws, master_ws)
-    copy_unique_rows(master_ws, link_ws)
-    update_description_and_links(master_ws, link_ws, dest_dir)
+        wb = load_workbook(master_path)
+        link_sheet = ensure_sheet(wb, LINK_SHEET_NAME)
+        link_ws.apply_to(link_sheet)
 
-    wb.save(master_path)
-    print(f"[INFO] Saved changes to: {master_path}", flush=True)
+        wb.save(master_path)
+        store.set_cells(LINK_SHEET_NAME, {cell: value for cell, (value, _) in link_ws.writes.items()})
+        print(f"[INFO] Saved changes to: {master_path}", flush=True)
 
 # =========================
 # Main Entry
 # =========================
 if __name__ == "__main__":
     print("[INFO] Starting Part 1: Copy PDFs...", flush=True)
-    new_count, overwritten_count, total_count = copy_pdfs(SOURCE_DIR, DEST_DIR, recursive=COPY_RECURSIVE)
+    new_count, updated_count, total_count = copy_pdfs(SOURCE_DIR, DEST_DIR, recursive=COPY_RECURSIVE)
 
     print("[INFO] Starting Part 2: Update Excel and Hyperlinks...", flush=True)
     process_master_excel(MASTER_PATH, DEST_DIR)
 
     print("[INFO] Completed all tasks successfully.", flush=True)
     print(f"New PDFs copied: {new_count}", flush=True)
-    print(f"PDFs overwritten: {overwritten_count}", flush=True)
-
-
-
-
+    print(f"PDFs updated: {updated_count}", flush=True)
@@ -2,6 +2,82 @@
 import os
 import pandas as pd
 from datetime import datetime
+from pdf_catalog import MONTH_FOLDER
+
+def upsert_master(master_df, source_df, id_col):
+    """
+    Apply the source rows to the master by ID, column-wise instead of row by row.
+
+    Same rules as walking source_df row by row: a row whose ID is in the master updates the first
+    master row with that ID; the first row of a new ID is added and later rows with that ID update
+    the added row. Only non-empty source cells that differ from the current value are written.
+    Returns (updated master, update records, added records), update records in source row /
+    column order.
+    """
+    source_df = source_df.reset_index(drop=True)
+    columns = list(source_df.columns)
+    src_ids = source_df[id_col]
+
+    # ID -> first master row with that ID; the first source row of every other ID is added
+    master_ids = master_df[id_col].drop_duplicates()
+    master_row_of = pd.Series(master_ids.index, index=master_ids.to_numpy())
+    in_master = src_ids.isin(master_row_of.index)
+    is_added = ~in_master & ~src_ids.duplicated()
+    added_df = source_df[is_added]
+
+    def to_cells(frame, ids, order):
+        # One row per (ID, column) cell; columns by position so any header type sorts
+        frame = frame.set_axis(range(len(columns)), axis=1).assign(_id=ids, _order=order)
+        return frame.melt(id_vars=["_id", "_order"], var_name="_col", value_name="_value")
+
+    # Starting values: the master row of each updated ID (before every source row), or the added row
+    touched = src_ids[in_master].drop_duplicates()
+    base = pd.concat([
+        to_cells(master_df.reindex(index=master_row_of[touched].to_numpy(), columns=columns), touched.to_numpy(), -1),
+        to_cells(added_df, added_df[id_col].to_numpy(), added_df.index),
+    ], ignore_index=True)
+    base["_base"] = True
+
+    # Non-empty cells of the remaining source rows, applied in row order on top of the start value
+    rest = source_df[~is_added]
+    updates = to_cells(rest, rest[id_col].to_numpy(), rest.index)
+    updates = updates[updates["_value"].notna()]
+    updates["_base"] = False
+
+    cells = pd.concat([base, updates], ignore_index=True).sort_values(["_order", "_col"], kind="mergesort")
+    # A cell changes when it differs from the previous cell of its (ID, column); an equal cell
+    # changes nothing, so comparing against it is the same as comparing against the current value
+    previous = cells.groupby(["_id", "_col"], sort=False)["_value"].shift()
+    kept = cells[cells["_base"] | cells["_value"].ne(previous)].copy()
+    # Old Value is the current value at that point: the start value or the last change
+    kept["_old"] = kept.groupby(["_id", "_col"], sort=False)["_value"].shift()
+    changes = kept[~kept["_base"]]
+
+    updated_changes = [
+        {"ID": src_id, "Column": columns[col], "Old Value": old_val, "New Value": new_val}
+        for src_id, col, old_val, new_val in zip(changes["_id"], changes["_col"], changes["_old"], changes["_value"])
+    ]
+    added_changes = added_df.to_dict("records")
+
+    # Write the final value of every changed cell, one column at a time
+    final = changes.drop_duplicates(["_id", "_col"], keep="last")
+    updated_master_df = master_df.copy()
+    added_rows = added_df.copy()
+    added_row_of = pd.Series(added_df.index, index=added_df[id_col].to_numpy())
+    for col, col_changes in final.groupby("_col"):
+        col_name = columns[col]
+        for frame, row_of in ((updated_master_df, master_row_of), (added_rows, added_row_of)):
+            hit = col_changes[col_changes["_id"].isin(row_of.index)]
+            if hit.empty:
+                continue
+            values = pd.Series(hit["_value"].to_numpy(), index=row_of[hit["_id"]].to_numpy())
+            merged = frame[col_name].astype(object) if col_name in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+            merged[values.index] = values
+            frame[col_name] = merged.infer_objects()
+
+    if not added_rows.empty:
+        updated_master_df = pd.concat([updated_master_df, added_rows], ignore_index=True)
+    return updated_master_df, updated_changes, added_changes
 
 def sync_and_update_master_detailed(source_folder, consolidated_master_path, sheet_name="All up", log_dir="C:/Users/PBalakr4/OneDrive - T-Mobile USA/Documents/PIA Automate/Logs"):
     # Validate paths
@@ -56,36 +132,12 @@ def sync_and_update_master_detailed(source_folder, consolidated_master_path, she
     # Assume first column is the unique identifier (ID)
     id_col = source_df.columns[0]
 
-    updated_changes = []  # For logging updates
-    added_changes = []    # For logging additions
-
     # Convert IDs to string for comparison
     master_df[id_col] = master_df[id_col].astype(str)
     source_df[id_col] = source_df[id_col].astype(str)
 
-    # Create a copy of master for updates
-    updated_master_df = master_df.copy()
-
-    for _, src_row in source_df.iterrows():
-        src_id = src_row[id_col]
-        if src_id in updated_master_df[id_col].values:
-            # Check for differences column by column
-            idx = updated_master_df[updated_master_df[id_col] == src_id].index[0]
-            for col in source_df.columns:
-                old_val = updated_master_df.at[idx, col]
-                new_val = src_row[col]
-                if pd.notna(new_val) and old_val != new_val:
-                    updated_master_df.at[idx, col] = new_val
-                    updated_changes.append({
-                        "ID": src_id,
-                        "Column": col,
-                        "Old Value": old_val,
-                        "New Value": new_val
-                    })
-        else:
-            # Add new row
-            updated_master_df = pd.concat([updated_master_df, pd.DataFrame([src_row])], ignore_index=True)
-            added_changes.append(src_row.to_dict())
+    # Align source and master on ID and apply all changes column-wise
+    updated_master_df, updated_changes, added_changes = upsert_master(master_df, source_df, id_col)
 
     # Save updated master sheet
     try:
@@ -123,7 +175,7 @@ def sync_and_update_master_detailed(source_folder, consolidated_master_path, she
 
 if __name__ == "__main__":
     # ✅ Hardcoded paths and sheet name
-    source_folder = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Jan 2026"
+    source_folder = MONTH_FOLDER  # set in pdf_catalog.py
     consolidated_master_path = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Consolidated_master.xlsx"
     sheet_name = "All up"
     log_dir = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Logs"
@@ -2,6 +2,7 @@
 import os
 import shutil
 import pandas as pd
+from pdf_catalog import MONTH_FOLDER, open_catalog
 
 def consolidate_pdfs(source_folder, consolidated_folder, newfiles_base_path):
     if not os.path.exists(source_folder):
@@ -25,30 +26,27 @@ def consolidate_pdfs(source_folder, consolidated_folder, newfiles_base_path):
         print(f"Error reading Excel file: {e}")
         return
 
-    excel_numbers = df.iloc[:, 0].dropna().astype(str).tolist()
+    excel_numbers = set(df.iloc[:, 0].dropna().astype(str))
 
     source_folder_name = os.path.basename(source_folder.rstrip("\\/"))
     new_folder_name = f"newfiles_{source_folder_name}"
     new_folder_path = os.path.join(newfiles_base_path, new_folder_name)
     os.makedirs(new_folder_path, exist_ok=True)
 
-    pdf_files = [f for f in os.listdir(source_folder) if f.lower().endswith('.pdf')]
     new_files_count = 0
 
-    for pdf in pdf_files:
-        try:
+    with open_catalog(refresh=False) as catalog:
+        # The catalog lists every .pdf; the number is parsed as before (text after the last '_'),
+        # not with the catalog's stricter _<digits>.pdf ID
+        for source_pdf_path, pdf, _ in catalog.files(source_folder):
             number_part = pdf.split('_')[-1].split('.')[0]
-        except IndexError:
-            continue
+            if number_part in excel_numbers:
+                consolidated_pdf_path = os.path.join(consolidated_folder, pdf)
 
-        if number_part in excel_numbers:
-            source_pdf_path = os.path.join(source_folder, pdf)
-            consolidated_pdf_path = os.path.join(consolidated_folder, pdf)
-
-            if not os.path.exists(consolidated_pdf_path):
-                shutil.copy2(source_pdf_path, consolidated_pdf_path)
-                shutil.copy2(source_pdf_path, os.path.join(new_folder_path, pdf))
-                new_files_count += 1
+                if not os.path.exists(consolidated_pdf_path):
+                    shutil.copy2(source_pdf_path, consolidated_pdf_path)
+                    shutil.copy2(source_pdf_path, os.path.join(new_folder_path, pdf))
+                    new_files_count += 1
 
     print(f"\nProcess completed. Total new PDFs copied: {new_files_count}")
     print(f"New files folder: {new_folder_path}")
@@ -61,7 +59,7 @@ if __name__ == "__main__":
     # newfiles_base_path = input("Enter base path for newfiles folder: ").strip()
 
     # OPTION 2: Hardcode paths safely using raw strings
-    source_folder = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Jan 2026"
+    source_folder = MONTH_FOLDER  # set in pdf_catalog.py
     consolidated_folder = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Consolidatedpdfs"
     newfiles_base_path = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Monthlynewfiles"
     consolidate_pdfs(source_folder, consolidated_folder, newfiles_base_path)
@@ -3,7 +3,11 @@ import re
 import sys
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
-from PyPDF2 import PdfReader
+from pdf_catalog import open_catalog
+from pdf_text_cache import get_page_texts
+from row_sink import RowSink
+from vendor_lexicon import load_vendor_matcher
+from workbook_session import workbook_session
 
 # ========= USER CONFIG =========
 EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
@@ -38,17 +42,6 @@ def normalize_id(val) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def extract_id_from_filename(filename: str) -> Optional[str]:
-    """
-    Extract trailing numeric ID that appears after the LAST '_' in the filename (before extension).
-    Example: 'SomeFile_12345.pdf' -> '12345'
-    """
-    base = os.path.basename(filename)
-    name, _ = os.path.splitext(base)
-    m = re.search(r'_(\d+)$', name)
-    return m.group(1) if m else None
-
-
 # ========= PDF PARSING =========
 # SECTION NUMBER RULE:
 # - Must be dotted: X.Y (e.g., 1.3, 3.41, 13.2)
@@ -74,9 +67,8 @@ def build_stop_regex(words: List[str]) -> re.Pattern:
 STOP_WORD_RE = build_stop_regex(STOP_WORDS)
 RESPONSE_START_RE = build_stop_regex(RESPONSE_START_WORDS)
 
-# Whole-word regexes for vendor names (case-insensitive)
-BLIS_WORD_RE = re.compile(r'\bblis\b', flags=re.IGNORECASE)
-VISTAR_WORD_RE = re.compile(r'\bvistar\b', flags=re.IGNORECASE)
+# Vendor names/aliases from vendor_lexicon.json: one whole-word, case-insensitive scan per line
+VENDOR_MATCHER = load_vendor_matcher()
 
 
 # ===== Helpers (normalize / filters) =====
@@ -155,7 +147,7 @@ def extract_sections_questions(pdf_path: str) -> Dict[str, str]:
     """
     section_to_question: Dict[str, str] = {}
     try:
-        reader = PdfReader(pdf_path)
+        page_texts = get_page_texts(pdf_path)
     except Exception as e:
         warn(f"Failed to open PDF '{pdf_path}': {e}")
         return section_to_question
@@ -175,12 +167,7 @@ def extract_sections_questions(pdf_path: str) -> Dict[str, str]:
         lines_seen = set()
         capturing = False
 
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            text = ""
+    for text in page_texts:
 
         for raw_line in text.splitlines():
             line = raw_line.strip()
@@ -240,12 +227,12 @@ def extract_sections_questions(pdf_path: str) -> Dict[str, str]:
 def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, List[str]]]:
     """
     Build a mapping:
-        section_number -> {"Blis": [para1, para2...], "Vistar": [para1, ...]}
+        section_number -> {vendor: [para1, para2...], ...} (vendors from the lexicon)
     Rules:
       - Start response capture after a line that is exactly one of RESPONSE_START_WORDS.
       - Stop response capture at the next section header.
       - Within the response block, split into paragraphs by blank lines (and single-word headings).
-      - If a paragraph contains 'Blis' or 'Vistar' (whole-word), capture the entire paragraph.
+      - If a paragraph contains a lexicon vendor name or alias (whole-word), capture the entire paragraph.
       - Skip obvious page-number lines (including N/M formats).
       - Remove duplicate lines within a paragraph (case-insensitive, whitespace-normalized), preserving order.
       - Dedup paragraphs per vendor (case-insensitive, whitespace-normalized).
@@ -253,7 +240,7 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
     """
     result: Dict[str, Dict[str, List[str]]] = {}
     try:
-        reader = PdfReader(pdf_path)
+        page_texts = get_page_texts(pdf_path)
     except Exception as e:
         warn(f"Failed to open PDF '{pdf_path}': {e}")
         return result
@@ -264,10 +251,6 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
     seen_line_keys_in_para: set = set()
     last_line_key: Optional[str] = None
 
-    def ensure_section_key(sec: str) -> None:
-        if sec not in result:
-            result[sec] = {"Blis": [], "Vistar": []}
-
     def paragraph_text_dedup() -> str:
         """Return paragraph text with internal duplicate lines removed, keeping original order."""
         out_lines: List[str] = []
@@ -288,23 +271,15 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
     def add_para_if_contains_vendor(sec: str, text: str) -> None:
         if not text:
             return
-        has_blis = bool(BLIS_WORD_RE.search(text))
-        has_vistar = bool(VISTAR_WORD_RE.search(text))
-        if not (has_blis or has_vistar):
+        vendors = VENDOR_MATCHER.labels_in(text)
+        if not vendors:
             return
-        ensure_section_key(sec)
         norm_key = normalize_para_for_dedup(text)
-        if has_blis:
-            key = (sec, "Blis")
+        for vendor in vendors:
+            key = (sec, vendor)
             dedup_sets.setdefault(key, set())
             if norm_key not in dedup_sets[key]:
-                result[sec]["Blis"].append(text)
-                dedup_sets[key].add(norm_key)
-        if has_vistar:
-            key = (sec, "Vistar")
-            dedup_sets.setdefault(key, set())
-            if norm_key not in dedup_sets[key]:
-                result[sec]["Vistar"].append(text)
+                result.setdefault(sec, {}).setdefault(vendor, []).append(text)
                 dedup_sets[key].add(norm_key)
 
     def reset_paragraph_state() -> None:
@@ -319,12 +294,7 @@ def extract_response_vendor_paragraphs(pdf_path: str) -> Dict[str, Dict[str, Lis
             add_para_if_contains_vendor(current_section, text)
         reset_paragraph_state()
 
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            text = ""
+    for text in page_texts:
 
         for raw_line in text.splitlines():
             line = raw_line.rstrip()
@@ -395,11 +365,11 @@ def parse_pdf_occurrences(pdf_path: str, section_to_question: Dict[str, str]) ->
     Rules:
       - Mentions before the first section -> Found in = "Cover Page", Questions = "Cover Page".
       - Mentions within a section -> Found in = section number, Questions = section_to_question[section].
-      - Whole-word matches only for 'Blis' or 'Vistar'.
+      - Whole-word matches only for lexicon vendor names/aliases.
     """
     occurrences: List[Tuple[str, str, str]] = []
     try:
-        reader = PdfReader(pdf_path)
+        page_texts = get_page_texts(pdf_path)
     except Exception as e:
         warn(f"Failed to open PDF '{pdf_path}': {e}")
         return occurrences
@@ -407,12 +377,7 @@ def parse_pdf_occurrences(pdf_path: str, section_to_question: Dict[str, str]) ->
     current_section_num: Optional[str] = None
     first_section_seen: bool = False
 
-    for page_idx, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text() or ""
-        except Exception as e:
-            warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
-            continue
+    for text in page_texts:
 
         for raw_line in text.splitlines():
             line = raw_line.strip()
@@ -424,23 +389,18 @@ def parse_pdf_occurrences(pdf_path: str, section_to_question: Dict[str, str]) ->
                 first_section_seen = True
                 continue
 
-            # Whole-word checks
-            has_blis = bool(BLIS_WORD_RE.search(line))
-            has_vistar = bool(VISTAR_WORD_RE.search(line))
+            # Whole-word checks (one scan for every vendor)
+            vendors = VENDOR_MATCHER.labels_in(line)
 
             if not first_section_seen:
                 # Cover Page mentions
-                if has_blis:
-                    occurrences.append(("Blis", "Cover Page", "Cover Page"))
-                if has_vistar:
-                    occurrences.append(("Vistar", "Cover Page", "Cover Page"))
+                for vendor in vendors:
+                    occurrences.append((vendor, "Cover Page", "Cover Page"))
             else:
                 if current_section_num:
                     qtext = section_to_question.get(current_section_num, "")
-                    if has_blis:
-                        occurrences.append(("Blis", current_section_num, qtext))
-                    if has_vistar:
-                        occurrences.append(("Vistar", current_section_num, qtext))
+                    for vendor in vendors:
+                        occurrences.append((vendor, current_section_num, qtext))
 
     return occurrences
 
@@ -449,16 +409,10 @@ def parse_pdf_occurrences(pdf_path: str, section_to_question: Dict[str, str]) ->
 def detect_vendors_in_filename(filename: str) -> List[str]:
     """
     Detect vendor names present in the filename (case-insensitive).
-    Returns any of ['Blis', 'Vistar'].
+    Returns lexicon vendor names, in lexicon order.
     Only matches whole words, so 'published.pdf' will NOT match 'Blis'.
     """
-    lower = filename.lower()
-    vendors: List[str] = []
-    if re.search(r'\bblis\b', lower, flags=re.IGNORECASE):
-        vendors.append("Blis")
-    if re.search(r'\bvistar\b', lower, flags=re.IGNORECASE):
-        vendors.append("Vistar")
-    return vendors
+    return VENDOR_MATCHER.labels_in(filename)
 
 
 # ========= EXCEL IO =========
@@ -476,13 +430,12 @@ def ensure_extract_headers(master_columns: List[str]) -> pd.DataFrame:
     If sheet is missing or empty, initialize with master headers.
     Return current sheet as DataFrame (with at least master columns).
     """
-    if not os.path.exists(EXTRACT_PATH):
-        log(f"Creating new extract workbook at {EXTRACT_PATH}")
-        df_new = pd.DataFrame(columns=master_columns)
-        with pd.ExcelWriter(EXTRACT_PATH, engine="openpyxl", mode="w") as writer:
-            df_new.to_excel(writer, sheet_name=EXTRACT_SHEET, index=False)
-
-    df = pd.read_excel(EXTRACT_PATH, sheet_name=EXTRACT_SHEET, engine="openpyxl")
+    with workbook_session(EXTRACT_PATH) as book:
+        if not book.exists():
+            log(f"Creating new extract workbook at {EXTRACT_PATH}")
+            df_new = pd.DataFrame(columns=master_columns)
+            book.replace(EXTRACT_SHEET, df_new)
+        df = book.read(EXTRACT_SHEET)
 
     for col in master_columns:
         if col not in df.columns:
@@ -549,26 +502,19 @@ def enforce_vendor_foundin_questions_response_source_at_PQRST(df: pd.DataFrame)
 
 
 def save_extract_df(df: pd.DataFrame) -> None:
-    with pd.ExcelWriter(EXTRACT_PATH, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-        df.to_excel(writer, sheet_name=EXTRACT_SHEET, index=False)
+    with workbook_session(EXTRACT_PATH) as book:
+        book.replace(EXTRACT_SHEET, df)
     log(f"Saved updates to {EXTRACT_PATH} (sheet '{EXTRACT_SHEET}')")
 
 
 # ========= FILE MATCHING =========
 def collect_pdf_matches(pdf_folder: str) -> Dict[str, List[str]]:
     """
-    Walk the folder and return a mapping: normalized_id -> list of PDF paths.
+    Return a mapping: normalized_id -> list of PDF paths under the folder (recursive), from the shared PDF catalog.
     Only includes files whose name contains a trailing _<digits>.
     """
-    mapping: Dict[str, List[str]] = {}
-    for root, _, files in os.walk(pdf_folder):
-        for f in files:
-            if not f.lower().endswith(".pdf"):
-                continue
-            fullpath = os.path.join(root, f)
-            fid = extract_id_from_filename(f)
-            if fid:
-                mapping.setdefault(fid, []).append(fullpath)
+    with open_catalog(refresh=False) as catalog:
+        mapping = catalog.id_map(pdf_folder, recursive=True)
     log(f"Indexed {sum(len(v) for v in mapping.values())} PDF(s) across {len(mapping)} ID(s).")
     return mapping
 
@@ -596,6 +542,8 @@ def main() -> None:
 
     # Collect PDFs by ID
     id_to_pdfs = collect_pdf_matches(PDF_FOLDER)
+    # Rows are buffered column-wise and turned into one DataFrame at the end
+    sink = RowSink(extract_df.columns)
     rows_appended = 0
 
     # Process each ID
@@ -643,7 +591,7 @@ def main() -> None:
             new_row["Questions"] = "Not Applicable"
             new_row["SourceFileName"] = os.path.basename(pdfs[0]) if pdfs else pd.NA
             new_row["Response Keyword Found"] = pd.NA
-            extract_df = pd.concat([extract_df, pd.DataFrame([new_row])], ignore_index=True)
+            sink.append(new_row)
             rows_appended += 1
         else:
             # Add each occurrence as its own row
@@ -662,10 +610,11 @@ def main() -> None:
                     new_row["Response Keyword Found"] = response_text
                 new_row["SourceFileName"] = source_file
 
-                extract_df = pd.concat([extract_df, pd.DataFrame([new_row])], ignore_index=True)
+                sink.append(new_row)
                 rows_appended += 1
 
     # Save
+    extract_df = sink.to_frame()
     extract_df = enforce_vendor_foundin_questions_response_source_at_PQRST(extract_df)
     save_extract_df(extract_df)
     log(f"Appended {rows_appended} row(s) into '{EXTRACT_SHEET}'.")
@@ -674,5 +623,7 @@ def main() -> None:
 
 if __name__ == "__main__":
     try:
-        main()
+        # Sheets are read once and written together when the session closes
+        with workbook_session(EXTRACT_PATH):
+            main()
     except Exception as e: warn(f"Script failed: {e}")
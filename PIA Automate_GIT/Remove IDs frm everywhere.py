@@ -13,7 +13,6 @@ Optimized for:
 """
 
 import os
-import re
 import sys
 import argparse
 from datetime import datetime
@@ -21,6 +20,9 @@ from typing import List, Dict, Set, Tuple, Optional
 
 import pandas as pd
 
+from master_store import MASTER_PATH, open_store
+from pdf_catalog import PdfCatalog, open_catalog
+
 
 # -----------------------------
 # Configuration (defaults)
@@ -217,32 +219,73 @@ def process_excel_file(
     return summary_lines, removed_ids
 
 
-def extract_id_from_pdf_filename(filename: str) -> Optional[int]:
+def process_master_store(
+    excel_path: str,
+    target_ids: Set[int],
+    dry_run: bool = False,
+    make_backup: bool = True,
+) -> Tuple[List[str], Set[int]]:
     """
-    Extract trailing numeric ID from filenames ending with _<ID>.pdf
-    E.g., "MyDoc_12345.pdf" -> 12345 (int)
-    Returns None if no match.
+    Master.xlsx variant of process_excel_file: the IDs are looked up in the Master store's integer ID
+    index (the same coercion as coerce_series_to_int) and deleted there, then the workbook is re-exported from the store. The workbook is not read
+    at all, and only rewritten when one of the IDs is present.
     """
-    m = re.search(r"_(\d+)\.pdf$", filename, flags=re.IGNORECASE)
-    if m:
-        try:
-            return int(m.group(1))
-        except ValueError:
-            return None
-    return None
+    summary_lines: List[str] = []
+    removed_ids: Set[int] = set()
+
+    if not os.path.isfile(excel_path):
+        summary_lines.append(f"[SKIP] Excel not found: {excel_path}")
+        return summary_lines, removed_ids
+
+    excel_name = os.path.basename(excel_path)
+    with open_store(excel_path) as store:
+        counts = store.id_counts(target_ids)
+        for sheet_name in store.sheet_names():
+            for tid in target_ids:
+                count = counts.get(sheet_name, {}).get(tid, 0)
+                if count > 0:
+                    removed_ids.add(tid)
+                    summary_lines.append(
+                        f"Excel {excel_name}, Sheet '{sheet_name}', ID {tid} found in {count} row{'s' if count != 1 else ''}, "
+                        f"All {count} row{'s' if count != 1 else ''} {'would be deleted' if dry_run else 'deleted'}."
+                    )
+
+        if removed_ids and not dry_run:
+            try:
+                if make_backup:
+                    backup_path = backup_excel(excel_path)
+                    summary_lines.append(f"[BACKUP] Created backup: {backup_path}")
+                store.delete_ids(removed_ids)
+                store.export_workbook(excel_path)
+                summary_lines.append(f"[UPDATED] Saved cleaned workbook: {excel_path}")
+            except Exception as e:
+                summary_lines.append(f"[ERROR] Failed to save cleaned workbook '{excel_path}': {e}")
+                # Keep the store in line with what is actually on disk
+                store.import_workbook(excel_path)
+        elif removed_ids and dry_run:
+            summary_lines.append(f"[DRY-RUN] No changes written for: {excel_path}")
+        else:
+            summary_lines.append(f"[NO-CHANGE] No matching IDs found in: {excel_name}")
+
+    return summary_lines, removed_ids
 
 
 def process_pdf_folders(
     folders: List[str],
     removed_ids: Set[int],
     dry_run: bool = False,
+    catalog: Optional[PdfCatalog] = None,
 ) -> List[str]:
     """
     Delete PDFs whose filenames end with _<ID>.pdf in provided folders, for IDs in removed_ids.
+    PDFs are found through the shared PDF catalog rather than by listing each folder.
     Return summary lines of deletions (or would-be deletions in dry-run).
     """
     summary_lines: List[str] = []
     canonical_ids: Set[int] = {int(x) for x in removed_ids if x is not None}
+    own_catalog = catalog is None
+    if own_catalog:
+        catalog = open_catalog(refresh=False)
 
     for folder in folders:
         if not os.path.isdir(folder):
@@ -250,30 +293,30 @@ def process_pdf_folders(
             continue
 
         deleted_count = 0
-        for entry in os.listdir(folder):
-            full_path = os.path.join(folder, entry)
-            if not os.path.isfile(full_path):
-                continue
-            if not entry.lower().endswith(".pdf"):
-                continue
-
-            id_in_name = extract_id_from_pdf_filename(entry)
-            if id_in_name is not None and id_in_name in canonical_ids:
-                if dry_run:
-                    summary_lines.append(f"[DRY-RUN] Would delete: {full_path}")
-                else:
-                    try:
-                        os.remove(full_path)
-                        deleted_count += 1
-                        summary_lines.append(f"[DELETED] {full_path}")
-                    except Exception as e:
-                        summary_lines.append(f"[ERROR] Could not delete '{full_path}': {e}")
+        # Catalogued IDs compared as integers, so e.g. _012345.pdf matches ID 12345
+        id_map = catalog.id_map(folder)
+        matched_paths = sorted(
+            (int(pdf_id), path) for pdf_id, paths in id_map.items() if int(pdf_id) in canonical_ids for path in paths
+        )
+        for _, full_path in matched_paths:
+            if dry_run:
+                summary_lines.append(f"[DRY-RUN] Would delete: {full_path}")
+            else:
+                try:
+                    os.remove(full_path)
+                    catalog.forget(full_path)
+                    deleted_count += 1
+                    summary_lines.append(f"[DELETED] {full_path}")
+                except Exception as e:
+                    summary_lines.append(f"[ERROR] Could not delete '{full_path}': {e}")
 
         if deleted_count == 0 and not dry_run:
             summary_lines.append(f"[INFO] No matching PDFs deleted in: {folder}")
         elif dry_run:
             summary_lines.append(f"[DRY-RUN] Completed scan for: {folder}")
 
+    if own_catalog:
+        catalog.close()
     return summary_lines
 
 
@@ -324,8 +367,10 @@ def main():
     all_summary_lines: List[str] = []
     all_removed_ids: Set[int] = set()
 
+    master_key = os.path.normcase(os.path.abspath(MASTER_PATH))
     for excel in args.excel_paths:
-        lines, removed_ids = process_excel_file(
+        is_master = os.path.normcase(os.path.abspath(excel)) == master_key
+        lines, removed_ids = (process_master_store if is_master else process_excel_file)(
             excel_path=excel,
             target_ids=target_ids,
             dry_run=args.dry_run,
@@ -0,0 +1,120 @@
+import json
+import random
+import re
+import timeit
+
+from extraction_rules import RULES_PATH
+from text_cleaning import clean_extracted_text, clean_text, remove_unwanted_phrases
+
+# Micro-benchmark: precompiled cleaners in text_cleaning.py vs the per-call, per-phrase
+# re.sub versions they replaced (copied below). Also checks both give identical output.
+# Usage: python bench_text_cleaning.py
+
+SAMPLES = 300
+REPEAT = 5
+SEED = 7
+
+# ---------------- Previous implementations ----------------
+def legacy_clean_text(text):
+    lines = text.splitlines()
+    cleaned_lines = []
+    prev_line = ""
+    for line in lines:
+        line = line.strip()
+        if line and line != prev_line:
+            cleaned_lines.append(line)
+        prev_line = line
+    text = " ".join(cleaned_lines)
+    text = re.sub(r"\bPage\s*\d+\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b", "", text)
+    text = re.sub(r"\b\d{1,2}:\d{2}(?:\s?[APMapm]{2})?\b", "", text)
+    text = re.sub(r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},\s+\d{4}\b", "", text)
+    text = re.sub(r"Assessment questions", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\bSection\s+\d+(\.\d+)*\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+def legacy_fix_exceptions(text, exception_phrases):
+    sep = r"(?:\s+|\s*\|\s*)"
+    for phrase in exception_phrases:
+        tokens = phrase.split()
+        if len(tokens) < 2:
+            continue
+        pattern = r"\b" + sep.join(re.escape(tok) for tok in tokens) + r"\b"
+        text = re.sub(pattern, " ".join(tokens), text, flags=re.IGNORECASE)
+    return text
+
+def legacy_clean_extracted_text(raw_text, exception_phrases=()):
+    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
+    seen = set()
+    unique_lines = []
+    for line in lines:
+        if line not in seen:
+            seen.add(line)
+            unique_lines.append(line)
+    text = " | ".join(unique_lines)
+    parts = text.split(" | ")
+    text = " | ".join(dict.fromkeys(parts))
+    text = legacy_fix_exceptions(text, exception_phrases)
+    text = re.sub(r"\s*\|\s*", " | ", text).strip(" |")
+    return text
+
+def legacy_remove_unwanted_phrases(text, phrases_to_remove):
+    for phrase in phrases_to_remove:
+        text = re.sub(r"\b" + re.escape(phrase) + r"\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b\d+\s*/\s*\d+\b", "", text)
+    text = re.sub(r"\d{4}\s+\d{1,2}:\d{2}\s*(AM|PM)?", "", text)
+    text = re.sub(r"\d{1,2}:\d{2}\s*(AM|PM)?", "", text)
+    text = re.sub(r"\d{2}/\d{2}/\d{4}", "", text)
+    text = re.sub(r"\s*\|\s*", " | ", text).strip(" |")
+    return text
+
+# ---------------- Sample data ----------------
+def load_phrase_lists():
+    with open(RULES_PATH, encoding="utf-8") as fh:
+        rules = json.load(fh)["columns"]
+    params = {}
+    for rule in rules:
+        for step in rule.get("response_cleaners", []):
+            params.update({k: v for k, v in step.items() if k != "name"})
+    return params.get("exception_phrases", []), params.get("phrases_to_remove", [])
+
+def make_samples(exception_phrases, remove_phrases, rng):
+    filler = ["Email Address", "Device ID", "IP Address", "Name", "Page 3", "12/01/2024", "10:45 AM",
+              "Jan 5, 2025", "Section 2.1", "Assessment questions", "1/2", "Yes", "No"]
+    broken = [re.sub(r"\s+", lambda _: rng.choice([" ", "\n", " | ", "\n| "]), p) for p in exception_phrases]
+    vocab = filler + remove_phrases + [p.upper() for p in remove_phrases[:3]] + broken
+    return ["\n".join(rng.choice(vocab) for _ in range(rng.randint(5, 60))) for _ in range(SAMPLES)]
+
+# ---------------- Benchmark ----------------
+def bench(label, new, old, samples):
+    mismatches = sum(new(s) != old(s) for s in samples)
+    new_t = min(timeit.repeat(lambda: [new(s) for s in samples], number=1, repeat=REPEAT))
+    old_t = min(timeit.repeat(lambda: [old(s) for s in samples], number=1, repeat=REPEAT))
+    print(f"{label:<26} old {old_t * 1000:8.2f} ms  new {new_t * 1000:8.2f} ms  "
+          f"speedup x{old_t / new_t:5.2f}  mismatches {mismatches}")
+    return mismatches
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    exception_phrases, remove_phrases = load_phrase_lists()
+    samples = make_samples(exception_phrases, remove_phrases, rng)
+    print(f"{len(samples)} samples, {len(remove_phrases)} removal phrases, {len(exception_phrases)} exception phrases")
+
+    mismatches = 0
+    mismatches += bench("clean_text", clean_text, legacy_clean_text, samples)
+    mismatches += bench("clean_extracted_text",
+                        lambda s: clean_extracted_text(s, exception_phrases),
+                        lambda s: legacy_clean_extracted_text(s, exception_phrases), samples)
+    mismatches += bench("remove_unwanted_phrases",
+                        lambda s: remove_unwanted_phrases(s, remove_phrases),
+                        lambda s: legacy_remove_unwanted_phrases(s, remove_phrases), samples)
+
+    # Cost as the removal list grows: old is linear in the list, new stays a fixed number of passes
+    for factor in (2, 4, 8):
+        grown = remove_phrases + [f"Synthetic removal phrase {i}" for i in range(len(remove_phrases) * (factor - 1))]
+        mismatches += bench(f"remove x{factor} ({len(grown)} phrases)",
+                            lambda s: remove_unwanted_phrases(s, grown),
+                            lambda s: legacy_remove_unwanted_phrases(s, grown), samples)
+
+    print("✅ Outputs identical." if mismatches == 0 else f"❌ {mismatches} mismatching output(s).")
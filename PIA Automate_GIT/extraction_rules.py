@@ -0,0 +1,444 @@
+"""
+Declarative question/response extraction for the Raw Extract sheet of Extract.xlsx.
+
+extraction_rules.json holds one entry per output column:
+  column             Raw Extract column to fill
+  search_phrases     question texts to look for (alternative wordings: any that are present in
+                     the pages read are used, in this order)
+  stop_strings       texts that end a Response; substituted for {STOPS} in stop_pattern
+  stop_pattern       regex whose first match after "Response" ends the window
+  document_cleaner   text_cleaning.CLEANERS name applied to the whole PDF text first, or null
+  response_cleaners  [{"name": <CLEANERS name>, <keyword args>...}] applied to each Response
+  dedupe_responses   drop repeated Responses before joining them with "; "
+  debug              print the raw and cleaned Responses
+  rules_revision     bump when a cleaner's code changes, so incremental runs re-extract
+
+Every column is filled from one parse per PDF: the phrases of all columns that read the same
+(raw or cleaned) document text are found with one matcher, and pages are only read until every
+requested column is satisfied: one of its search phrases was found and the Response window of
+each phrase found so far is closed (PageWindowTracker, one page at a time). The search phrases of
+a column are alternative template wordings, so once a column is satisfied a wording that only
+appears later in the document is not read and comes back as not found.
+Extract.xlsx is read and written once per run.
+The master sync only compares rows whose master or Raw Extract values changed since they were
+last found in sync (row fingerprints in the extraction state store).
+
+Run options (extraction scripts and pipeline.py): --pdf-workers N extracts N PDFs at a time in a
+process pool (default PDF_WORKERS, i.e. one at a time in this process). --incremental only
+re-extracts the cells whose PDF or rules changed since they were written; without it every cell is
+recomputed, which is also how to force a rebuild (the recorded state is refreshed either way).
+"""
+import argparse
+import json
+import os
+import re
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from pdf_catalog import open_catalog
+from parquet_store import write_dataset
+from pdf_text_cache import iter_page_texts
+from pia_extraction import (
+    STOP_MARGIN, ExtractionState, compile_pattern, find_phrases, is_up_to_date, read_pages_until, rules_version,
+    run_in_pool,
+)
+from row_sink import RowSink
+from text_cleaning import CLEANERS
+from workbook_session import workbook_session
+
+# Hardcoded paths
+MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Consolidated_Master.xlsx"
+EXTRACT_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Extract.xlsx"
+PDF_FOLDER = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Consolidatedpdfs"
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extraction_rules.json")
+
+# Columns to copy from master
+COLUMNS_TO_COPY = ["ID", "Name", "Stage", "Date created", "Respondent", "Date submitted", "Date completed"]
+
+# Worker processes for PDF extraction (1 = run in this process, one PDF at a time); raise it here
+# or per run with --pdf-workers N, e.g. --pdf-workers 15 on the 16-core batch machine
+PDF_WORKERS = 1
+
+# Only re-extract rows whose PDF or extraction rules changed since the value was written (state in
+# extraction_state.sqlite). Off: every run recomputes every cell; turn on per run with --incremental
+INCREMENTAL = False
+
+NOT_FOUND = "Not found in PDF"
+STOPS_PLACEHOLDER = "{STOPS}"
+
+
+# ---------------- Rules ----------------
+class ColumnRule:
+    """One compiled entry of extraction_rules.json."""
+
+    def __init__(self, spec: dict):
+        self.column = spec["column"]
+        self.search_phrases = list(spec["search_phrases"])
+        self.stop_strings = list(spec.get("stop_strings", []))
+        self.document_cleaner = spec.get("document_cleaner")
+        self.response_cleaners = [
+            (step["name"], {k: v for k, v in step.items() if k != "name"}) for step in spec.get("response_cleaners", [])
+        ]
+        self.dedupe_responses = bool(spec.get("dedupe_responses", False))
+        self.debug = bool(spec.get("debug", False))
+
+        for name in [self.document_cleaner] + [name for name, _ in self.response_cleaners]:
+            if name is not None and name not in CLEANERS:
+                raise ValueError(f"Unknown cleaner '{name}' in rule for column '{self.column}'")
+
+        stops = "|".join(map(re.escape, self.stop_strings))
+        self.stop_re = compile_pattern(spec["stop_pattern"].replace(STOPS_PLACEHOLDER, stops))
+        self.margin = max((len(s) for s in self.stop_strings), default=0) + STOP_MARGIN
+        self.version = rules_version(spec)
+
+    def find_window(self, text: str, phrase_index: int) -> Optional[Tuple[str, Optional[int]]]:
+        """(text after the Response marker, index of the first stop in it or None), or None if there is no Response."""
+        response_index = text.find("Response", phrase_index)
+        if response_index == -1:
+            return None
+        after_response = text[response_index + len("Response"):].lstrip()
+        after_response = re.sub(r"^Response\s*", "", after_response, flags=re.IGNORECASE)
+        stop_match = self.stop_re.search(after_response)
+        return after_response, (stop_match.start() if stop_match else None)
+
+    def window_closed(self, text: str, phrase_index: int) -> bool:
+        """True once reading more pages can no longer change this phrase's Response."""
+        window = self.find_window(text, phrase_index)
+        if window is None or window[1] is None:
+            return False
+        after_response, stop_index = window
+        return len(after_response) - stop_index > self.margin
+
+    def extract_response(self, text: str, phrase: str, phrase_index: int) -> Optional[str]:
+        window = self.find_window(text, phrase_index)
+        if window is None:
+            return None
+        after_response, stop_index = window
+        raw_text = (after_response[:stop_index] if stop_index is not None else after_response).strip()
+        if not self.response_cleaners:
+            return raw_text
+
+        if self.debug:
+            print(f"[DEBUG] Raw extracted section for phrase '{phrase}':")
+            print(raw_text[:500])
+        cleaned_text = raw_text
+        for name, params in self.response_cleaners:
+            cleaned_text = CLEANERS[name](cleaned_text, **params)
+        if self.debug:
+            print(f"[DEBUG] Cleaned text after processing:")
+            print(cleaned_text)
+        return cleaned_text
+
+
+class RuleSet:
+    """The column rules of one run, in rules-file order."""
+
+    def __init__(self, rules: List[ColumnRule]):
+        self.rules = rules
+        self.by_column = {rule.column: rule for rule in rules}
+
+    @property
+    def columns(self) -> List[str]:
+        return [rule.column for rule in self.rules]
+
+
+def load_rules(path: str = RULES_PATH, columns: Optional[Sequence[str]] = None) -> RuleSet:
+    """Compile the rules file, optionally keeping only `columns`."""
+    with open(path, encoding="utf-8") as fh:
+        rules = [ColumnRule(spec) for spec in json.load(fh)["columns"]]
+    if columns is not None:
+        unknown = set(columns) - {rule.column for rule in rules}
+        if unknown:
+            raise ValueError(f"No extraction rule for column(s): {', '.join(sorted(unknown))}")
+        rules = [rule for rule in rules if rule.column in columns]
+    return RuleSet(rules)
+
+
+# ---------------- Extraction ----------------
+def _document_views(raw_text: str, rules: Sequence[ColumnRule]) -> Dict[Optional[str], str]:
+    """The raw text plus each document-cleaned variant some rule reads, keyed by cleaner name."""
+    return {
+        name: raw_text if name is None else CLEANERS[name](raw_text)
+        for name in dict.fromkeys(rule.document_cleaner for rule in rules)
+    }
+
+
+def _phrase_positions(views: Dict[Optional[str], str], rules: Sequence[ColumnRule]) -> Dict[str, Dict[str, int]]:
+    """{column: {phrase: first index}}, scanning each document view once for the phrases of every rule on it."""
+    phrases_by_view: Dict[Optional[str], Dict[str, None]] = {}
+    for rule in rules:
+        phrases_by_view.setdefault(rule.document_cleaner, {}).update(dict.fromkeys(rule.search_phrases))
+    found = {view: find_phrases(views[view], tuple(phrases)) for view, phrases in phrases_by_view.items()}
+    return {
+        rule.column: {p: found[rule.document_cleaner][p] for p in rule.search_phrases if p in found[rule.document_cleaner]}
+        for rule in rules
+    }
+
+
+def _all_windows_closed(raw_text: str, rules: Sequence[ColumnRule]) -> bool:
+    """True if every rule has a phrase in the text and every phrase found has a closed Response window."""
+    views = _document_views(raw_text, rules)
+    positions = _phrase_positions(views, rules)
+    for rule in rules:
+        found = positions[rule.column]
+        if not found:
+            return False
+        if not all(rule.window_closed(views[rule.document_cleaner], idx) for idx in found.values()):
+            return False
+    return True
+
+
+class PageWindowTracker:
+    """
+    Stop check for read_pages_until, fed one page at a time: True once _all_windows_closed holds.
+    Each page is added to the document views (cleaned views are built from cleaned pages) and only
+    searched together with an overlap for a phrase across the page break. When the views say every
+    rule is satisfied, _all_windows_closed confirms it once on the joined text, since cleaning page
+    by page can differ from cleaning the whole text at page breaks (after a failed confirmation the
+    next one waits until the text has doubled).
+    """
+
+    def __init__(self, rules: Sequence[ColumnRule]):
+        self.rules = list(rules)
+        self.pages: List[str] = []
+        self.views: Dict[Optional[str], str] = {name: "" for name in dict.fromkeys(r.document_cleaner for r in self.rules)}
+        self.found: Dict[str, Dict[str, int]] = {rule.column: {} for rule in self.rules}
+        self.closed: Dict[str, set] = {rule.column: set() for rule in self.rules}
+        self.confirm_from = 0
+
+    def __call__(self, page_text: str) -> bool:
+        self.pages.append(page_text)
+        starts = {}
+        for name, view in self.views.items():
+            starts[name] = len(view)
+            # Pages are joined as read_pages_until joins them; cleaned text is joined as clean_text joins lines
+            chunk, sep = (page_text, "\n") if name is None else (CLEANERS[name](page_text), " ")
+            if chunk:
+                self.views[name] = view + sep + chunk if view else chunk
+
+        satisfied = True
+        for rule in self.rules:
+            view = self.views[rule.document_cleaner]
+            found, closed = self.found[rule.column], self.closed[rule.column]
+            missing = tuple(p for p in dict.fromkeys(rule.search_phrases) if p not in found)
+            if missing:
+                region_start = max(0, starts[rule.document_cleaner] - max(len(p) for p in missing) + 1)
+                for phrase, idx in find_phrases(view[region_start:], missing).items():
+                    found[phrase] = region_start + idx
+            # A closed window stays closed: later pages cannot move its stop
+            closed.update(p for p, idx in found.items() if p not in closed and rule.window_closed(view, idx))
+            if not found or len(closed) < len(found):
+                satisfied = False
+
+        text_length = sum(len(p) for p in self.pages)
+        if not satisfied or text_length < self.confirm_from:
+            return False
+        if _all_windows_closed("\n".join(self.pages), self.rules):
+            return True
+        self.confirm_from = 2 * text_length
+        return False
+
+
+def extract_text_from_pdf(pdf_path: str, rules: Sequence[ColumnRule], digest: Optional[str] = None) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Read the PDF page by page only until every rule is satisfied (see PageWindowTracker; the whole
+    document if a rule's phrases are missing or a window never closes) and return
+    {column: {phrase: response text or None}}.
+    """
+    raw_text = read_pages_until(iter_page_texts(pdf_path, digest), PageWindowTracker(rules))
+    if any(rule.debug for rule in rules):
+        print(f"\n[DEBUG] Extracted text from {os.path.basename(pdf_path)} (first 500 chars):")
+        print(raw_text[:500])
+
+    views = _document_views(raw_text, rules)
+    positions = _phrase_positions(views, rules)
+    return {
+        rule.column: {
+            phrase: rule.extract_response(views[rule.document_cleaner], phrase, positions[rule.column][phrase])
+            if phrase in positions[rule.column] else None
+            for phrase in rule.search_phrases
+        }
+        for rule in rules
+    }
+
+
+def extract_row(rule_set: RuleSet, task) -> Dict[str, str]:
+    """
+    {column: value} for one (row_id, pdf_path, digest, columns) task.
+    Module-level so the process pool can pickle it (bound to the rule set with functools.partial).
+    """
+    row_id, pdf_path, digest, columns = task
+    if pdf_path is None:
+        print(f"❌ No PDF found for ID {row_id}")
+        return {column: NOT_FOUND for column in columns}
+    print(f"\n📄 Processing PDF for ID {row_id}: {pdf_path}")
+
+    rules = [rule_set.by_column[column] for column in columns]
+    extracted = extract_text_from_pdf(pdf_path, rules, digest)
+    values = {}
+    for rule in rules:
+        responses = []
+        for phrase in rule.search_phrases:
+            extracted_text = extracted[rule.column][phrase]
+            if extracted_text:
+                if not (rule.dedupe_responses and extracted_text in responses):
+                    responses.append(extracted_text)
+                print(f"✅ Extracted for ID {row_id} | {rule.column} | Phrase: {phrase}")
+            else:
+                print(f"⚠️ No match for phrase '{phrase}' in PDF for ID {row_id}")
+        # Combine responses or mark as Not Found
+        values[rule.column] = "; ".join(responses) if responses else NOT_FOUND
+    return values
+
+
+# ---------------- PART 1: Update Raw Extract from master ----------------
+def row_fingerprints(frame: pd.DataFrame) -> List[str]:
+    """One content hash per row, as text for the state store."""
+    return [format(h, "016x") for h in pd.util.hash_pandas_object(frame, index=False)]
+
+
+def update_extract(extract_df: pd.DataFrame, master_df: pd.DataFrame, columns: Sequence[str],
+                   state: Optional[ExtractionState] = None) -> pd.DataFrame:
+    """
+    Copy COLUMNS_TO_COPY from the master into Raw Extract (non-empty master cells win) and add a
+    row for every master ID not in Raw Extract yet.
+
+    With `state`, each ID whose master row and Raw Extract row were found in sync by an earlier
+    run is recorded with a fingerprint of both rows' COLUMNS_TO_COPY values; while neither
+    fingerprint changes the row is skipped, so repeated syncs only look at new or edited rows.
+    """
+    # Ensure required columns exist
+    for col in COLUMNS_TO_COPY:
+        if col not in extract_df.columns:
+            extract_df[col] = ""
+
+    # Ensure the extracted columns exist and are object type
+    for column in columns:
+        if column not in extract_df.columns:
+            extract_df[column] = pd.Series([""] * len(extract_df), dtype="object")
+        else:
+            extract_df[column] = extract_df[column].astype("object")
+
+    copy_cols = [col for col in COLUMNS_TO_COPY if col in master_df.columns]
+    master_ids = master_df["ID"].tolist()
+    master_fps = row_fingerprints(master_df[copy_cols])
+    extract_fps = row_fingerprints(extract_df[COLUMNS_TO_COPY])
+    recorded = state.load_synced() if state is not None else {}
+    # Rows sharing an ID are applied one after another, so they are never skipped
+    repeated = set(master_df["ID"][master_df["ID"].duplicated()].astype(str))
+
+    # ID -> position of the first Raw Extract row with that ID
+    extract_pos = {}
+    for pos, row_id in enumerate(extract_df["ID"]):
+        extract_pos.setdefault(row_id, pos)
+    new_rows = RowSink(extract_df.columns)
+    new_index = {}
+
+    in_sync = {}
+    stale = []
+    skipped = 0
+    master_rows = master_df[copy_cols].itertuples(index=False, name=None)
+    for row_id, values, master_fp in zip(master_ids, master_rows, master_fps):
+        key = str(row_id)
+        pos = extract_pos.get(row_id)
+        if pos is not None:
+            if key not in repeated and recorded.get(key) == (master_fp, extract_fps[pos]):
+                skipped += 1
+                continue
+            idx = extract_df.index[pos]
+            changed = False
+            for col, value in zip(copy_cols, values):
+                if pd.notna(value) and extract_df.at[idx, col] != value:
+                    extract_df.at[idx, col] = value
+                    changed = True
+            if changed or key in repeated:
+                stale.append(key)
+            else:
+                # Verified in sync as read: later runs skip it until either row changes
+                in_sync[key] = (master_fp, extract_fps[pos])
+        elif row_id in new_index:
+            new_pos = new_index[row_id]
+            for col, value in zip(copy_cols, values):
+                if pd.notna(value) and new_rows.get(new_pos, col) != value:
+                    new_rows.set(new_pos, col, value)
+        else:
+            new_row = {col: "" for col in COLUMNS_TO_COPY}
+            new_row.update(zip(copy_cols, values))
+            for column in columns:
+                new_row[column] = ""
+            new_index[row_id] = new_rows.append(new_row)
+
+    if state is not None:
+        state.save_synced(in_sync, stale)
+        print(f"ℹ️ Master sync: {skipped} unchanged row(s) skipped, {len(new_rows)} added")
+    return new_rows.to_frame(base=extract_df)
+
+
+# ---------------- PART 2: Extract text from PDFs ----------------
+def process_pdfs(extract_df: pd.DataFrame, rule_set: RuleSet, workers: int = PDF_WORKERS, incremental: bool = INCREMENTAL) -> pd.DataFrame:
+    with open_catalog(refresh=False) as catalog, ExtractionState() as state:
+        # Index the PDFs in the shared catalog once: ID -> first matching PDF path
+        resolver = catalog.resolver(PDF_FOLDER)
+        recorded = {rule.column: state.load(rule.column) if incremental else {} for rule in rule_set.rules}
+
+        tasks = []
+        task_rows = []
+        skipped = 0
+        for idx, row_id in zip(extract_df.index, extract_df["ID"].astype(str)):
+            pdf_path = resolver.resolve(row_id)
+            digest = catalog.digest(pdf_path) if pdf_path else None
+            columns = tuple(
+                rule.column for rule in rule_set.rules
+                if not (incremental and is_up_to_date(recorded[rule.column], row_id, digest, rule.version, extract_df.at[idx, rule.column]))
+            )
+            skipped += len(rule_set.rules) - len(columns)
+            if columns:
+                tasks.append((row_id, pdf_path, digest, columns))
+                task_rows.append(idx)
+        print(f"ℹ️ {len(tasks)} row(s) to extract, {skipped} unchanged cell(s) skipped")
+
+        extracted = {rule.column: {} for rule in rule_set.rules}
+        for idx, task, values in zip(task_rows, tasks, run_in_pool(partial(extract_row, rule_set), tasks, workers)):
+            row_id, _, digest, _ = task
+            for column, value in values.items():
+                extract_df.at[idx, column] = value
+                if digest:
+                    extracted[column][row_id] = (digest, rule_set.by_column[column].version)
+        for column, records in extracted.items():
+            state.save(column, records)
+    return extract_df
+
+
+# ---------------- MAIN ----------------
+def run_options(argv: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """
+    run_extraction() keyword arguments from the command line (--pdf-workers N, --incremental). Other
+    arguments are ignored, so pipeline.py's command line reaches the stages it runs unchanged.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--pdf-workers", type=int, default=PDF_WORKERS)
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL)
+    args, _ = parser.parse_known_args(argv)
+    return {"workers": max(1, args.pdf_workers), "incremental": args.incremental}
+
+
+def run_extraction(columns: Optional[Sequence[str]] = None, workers: int = PDF_WORKERS,
+                   incremental: bool = INCREMENTAL, rules_path: str = RULES_PATH) -> None:
+    """Sync Raw Extract with the master and fill `columns` (default: every rule) in one pass."""
+    rule_set = load_rules(rules_path, columns)
+    master_df = pd.read_excel(MASTER_PATH)
+    with workbook_session(EXTRACT_PATH) as book:
+        extract_df = book.read("Raw Extract")
+
+        with ExtractionState() as state:
+            extract_df = update_extract(extract_df, master_df, rule_set.columns, state)
+        print(f"✅ Raw Extract synced with master ({len(extract_df)} rows).")
+        extract_df = process_pdfs(extract_df, rule_set, workers, incremental)
+
+        # Replace only the "Raw Extract" sheet without deleting others
+        book.replace("Raw Extract", extract_df)
+    write_dataset(extract_df, "Raw Extract")
+
+    print(f"✅ PDF processing completed and Raw Extract sheet updated: {', '.join(rule_set.columns)}.")
@@ -0,0 +1,100 @@
+"""
+Aho-Corasick keyword matcher: finds every occurrence of any number of terms in one scan.
+
+Terms are matched case-insensitively (terms and text both go through `fold`), either anywhere
+(like `str.contains(case=False, regex=False)`, which folds with str.upper) or as whole words
+(like a regex `\\bterm\\b`). Each term carries a label (vendor name, identifier row, ...);
+several terms may share one label (aliases). The cost of a scan grows with the length of the
+text, not with the number of terms.
+"""
+from collections import deque
+from typing import Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Tuple, TypeVar
+
+L = TypeVar("L", bound=Hashable)
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _word_boundary(text: str, i: int) -> bool:
+    """Same rule as regex \\b at index i of text."""
+    before = i > 0 and _is_word(text[i - 1])
+    after = i < len(text) and _is_word(text[i])
+    return before != after
+
+
+class KeywordMatcher(Generic[L]):
+    """Compiled automaton over (term, label) pairs; label order is the order labels were first given."""
+
+    def __init__(self, terms: Iterable[Tuple[str, L]], whole_word: bool = True,
+                 fold: Callable[[str], str] = str.lower):
+        self.whole_word = whole_word
+        self.fold = fold
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # per state: (term length, label) for every term ending there (own and inherited via fail links)
+        self._out: List[List[Tuple[int, L]]] = [[]]
+        self._rank: Dict[L, int] = {}
+        for term, label in terms:
+            key = fold(term)
+            if not key:
+                continue
+            self._rank.setdefault(label, len(self._rank))
+            self._add(key, label)
+        self._build()
+
+    @property
+    def labels(self) -> List[L]:
+        return list(self._rank)
+
+    def _add(self, key: str, label: L) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if (len(key), label) not in self._out[state]:
+            self._out[state].append((len(key), label))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt].extend(o for o in self._out[self._fail[nxt]] if o not in self._out[nxt])
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, L]]:
+        """Yield (start, end, label) for every (possibly overlapping) occurrence, in order of end position."""
+        goto, fail, out = self._goto, self._fail, self._out
+        folded = self.fold(text)
+        state = 0
+        for i, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for length, label in out[state]:
+                start = end - length
+                if self.whole_word and not (_word_boundary(folded, start) and _word_boundary(folded, end)):
+                    continue
+                yield start, end, label
+
+    def labels_in(self, text: str) -> List[L]:
+        """Distinct labels with at least one match in `text`, in label order."""
+        if not text:
+            return []
+        found = {label for _, _, label in self.iter_matches(text)}
+        return sorted(found, key=self._rank.__getitem__)
@@ -0,0 +1,419 @@
+"""
+SQLite system of record for the SharePoint Master.xlsx (Master, Keyword to ID mapped, Vendor
+Details, PIAs Link and any other sheet in it).
+
+Every sheet row is stored with its row number, its normalized ID, its ID as an integer (when the
+cell holds one, e.g. '012345' or 12345.0) and, for Keyword to ID mapped, a hash of its (ID,
+Keywords, Category, Type of Identifier) composite key; all keys are indexed.
+Stages check membership, read rows and delete by ID with indexed queries instead of loading and
+scanning the workbook, and record every change they make to the workbook here as well, so
+Master.xlsx stays an export view of the store (export_workbook() regenerates it).
+
+The store also records the workbook's size and mtime after every change it mirrors. open_store()
+compares them with the file on disk and reloads the store from the workbook only when they
+differ, i.e. the first time and after Master.xlsx was edited by hand. To force a reload:
+  python master_store.py --import
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from openpyxl import Workbook, load_workbook
+
+# ========= USER CONFIG =========
+STORE_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\master_store.sqlite"
+MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & CyberSecurity\Privacy\PIA Files\T-Ads PIAs Automation\Master.xlsx"
+
+MASTER_SHEET = "Master"
+KEYWORD_SHEET = "Keyword to ID mapped"
+VENDOR_SHEET = "Vendor Details"
+LINK_SHEET = "PIAs Link"
+
+# Dedup key of the Keyword to ID mapped sheet (headers missing from the sheet are left out)
+COMPOSITE_HEADERS = ["ID", "Keywords", "Category", "Type of Identifier"]
+COMPOSITE_SHEETS = {KEYWORD_SHEET}
+
+# Columns whose cells are hyperlinks to their own value (re-created by export_workbook)
+HYPERLINK_COLUMNS = {LINK_SHEET: 4}
+
+# Bump when the stored keys change; a store written by another version is reloaded
+STORE_VERSION = "3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    name     TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    sheet     TEXT NOT NULL,
+    row_num   INTEGER NOT NULL,
+    id_key    TEXT,
+    id_num    INTEGER,
+    combo_key TEXT,
+    data      TEXT NOT NULL,
+    PRIMARY KEY (sheet, row_num)
+);
+CREATE INDEX IF NOT EXISTS sheet_rows_id ON sheet_rows (sheet, id_key);
+CREATE INDEX IF NOT EXISTS sheet_rows_id_num ON sheet_rows (sheet, id_num);
+CREATE INDEX IF NOT EXISTS sheet_rows_combo ON sheet_rows (sheet, combo_key);
+"""
+
+
+# ========= KEYS / VALUES =========
+def normalize(val) -> str:
+    """Comparison form of an ID or key cell: trimmed, lower-case, '' for empty cells."""
+    return str(val).strip().lower() if val else ""
+
+
+def numeric_id(val) -> Optional[int]:
+    """
+    Integer form of an ID cell, read as Remove IDs' coerce_series_to_int reads it:
+    '012345', 12345.0 and '12345.0' -> 12345; non-numeric or non-integral cells -> None.
+    """
+    if val is None or isinstance(val, bool):
+        return None
+    if isinstance(val, int):
+        return val
+    text = str(val).strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def combo_key(values: Sequence) -> str:
+    """Stored form of a composite key (a tuple of normalize()d values): a fixed-size hash."""
+    return hashlib.sha1(json.dumps(list(values), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def composite_indices(header: Sequence) -> List[int]:
+    """Positions of the COMPOSITE_HEADERS present in a header row."""
+    header_map = {(str(h).strip() if h else "").lower(): idx for idx, h in enumerate(header)}
+    return [header_map[h.lower()] for h in COMPOSITE_HEADERS if h.lower() in header_map]
+
+
+def row_combo(row: Sequence, indices: Sequence[int]) -> Tuple[str, ...]:
+    return tuple(normalize(row[idx]) if idx < len(row) else "" for idx in indices)
+
+
+def _id_column(header: Sequence) -> int:
+    """Position of the 'ID' header (case-insensitive), or column A."""
+    for idx, h in enumerate(header):
+        if normalize(h) == "id":
+            return idx
+    return 0
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$time": value.isoformat()}
+    return str(value)
+
+
+def _decode_value(obj):
+    if "$datetime" in obj:
+        return datetime.datetime.fromisoformat(obj["$datetime"])
+    if "$date" in obj:
+        return datetime.date.fromisoformat(obj["$date"])
+    if "$time" in obj:
+        return datetime.time.fromisoformat(obj["$time"])
+    return obj
+
+
+def _trimmed(row: Iterable) -> list:
+    row = list(row)
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def workbook_signature(path: str) -> Optional[str]:
+    """'size:mtime_ns' of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+# ========= STORE =========
+class MasterStore:
+    """SQLite copy of the Master.xlsx sheets. Use open_store() to get one filled from the workbook."""
+
+    def __init__(self, db_path: str = STORE_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(sheet_rows)")}
+        if columns and "id_num" not in columns:
+            # Written by an older version without the integer ID: start empty, open_store() reloads it
+            self.conn.executescript("DROP TABLE sheet_rows; DROP TABLE IF EXISTS sheets;")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MasterStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ----- import / export -----
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_loaded(self, workbook_path: str = MASTER_PATH) -> bool:
+        """True if the store holds `workbook_path` (filled by import_workbook, same store version)."""
+        return self._meta("workbook") == _key(workbook_path) and self._meta("version") == STORE_VERSION
+
+    def is_current(self, workbook_path: str = MASTER_PATH) -> bool:
+        """True if the store holds `workbook_path` and the file is unchanged since the store last saw it."""
+        return self.is_loaded(workbook_path) and self._meta("signature") == workbook_signature(workbook_path)
+
+    def _record_signature(self) -> None:
+        """Note the current size/mtime of the stored workbook (call inside the transaction of a write)."""
+        workbook = self._meta("workbook")
+        if workbook is not None:
+            self._set_meta("signature", workbook_signature(workbook) or "")
+
+    def import_workbook(self, workbook_path: str = MASTER_PATH) -> None:
+        """Replace the store's contents with every sheet of the workbook (one streaming read)."""
+        wb = load_workbook(workbook_path, read_only=True)
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM sheets")
+                self.conn.execute("DELETE FROM sheet_rows")
+                for position, sheet in enumerate(wb.sheetnames):
+                    ws = wb[sheet]
+                    ws.reset_dimensions()  # read every stored row, whatever size the file declares
+                    self.conn.execute("INSERT INTO sheets (name, position) VALUES (?, ?)", (sheet, position))
+                    self._insert_rows(sheet, enumerate(ws.iter_rows(values_only=True), start=1))
+                self._set_meta("workbook", _key(workbook_path))
+                self._set_meta("version", STORE_VERSION)
+                self._record_signature()
+        finally:
+            wb.close()
+        counts = ", ".join(f"{sheet}: {max(self.row_count(sheet) - 1, 0)}" for sheet in self.sheet_names())
+        print(f"[INFO] Loaded {workbook_path} into {self.db_path} ({counts} data rows)", flush=True)
+
+    def export_workbook(self, workbook_path: str = MASTER_PATH) -> None:
+        """Write every stored sheet to a new workbook at `workbook_path` (the Excel view of the store)."""
+        wb = Workbook()
+        wb.remove(wb.active)
+        for sheet in self.sheet_names():
+            ws = wb.create_sheet(title=sheet)
+            for row in self.rows(sheet):
+                ws.append(row)
+            link_col = HYPERLINK_COLUMNS.get(sheet)
+            if link_col:
+                for (cell,) in ws.iter_rows(min_row=2, min_col=link_col, max_col=link_col):
+                    if cell.value:
+                        cell.hyperlink = cell.value
+                        cell.style = "Hyperlink"
+        wb.save(workbook_path)
+        if self._meta("workbook") == _key(workbook_path):
+            with self.conn:
+                self._record_signature()
+
+    # ----- reads -----
+    def sheet_names(self) -> List[str]:
+        return [r[0] for r in self.conn.execute("SELECT name FROM sheets ORDER BY position")]
+
+    def has_sheet(self, sheet: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM sheets WHERE name = ?", (sheet,)).fetchone() is not None
+
+    def row_count(self, sheet: str) -> int:
+        """Number of the last stored row of the sheet (0 if it is empty)."""
+        row = self.conn.execute("SELECT MAX(row_num) FROM sheet_rows WHERE sheet = ?", (sheet,)).fetchone()
+        return row[0] or 0
+
+    def rows(self, sheet: str, max_col: Optional[int] = None, min_row: int = 1) -> List[tuple]:
+        """Row values from `min_row` to the last stored row, as read_only iter_rows(values_only=True) gives them."""
+        result: List[tuple] = []
+        for row_num, data in self.conn.execute(
+            "SELECT row_num, data FROM sheet_rows WHERE sheet = ? AND row_num >= ? ORDER BY row_num", (sheet, min_row)
+        ):
+            while len(result) < row_num - min_row:
+                result.append(())
+            values = json.loads(data, object_hook=_decode_value)
+            result.append(tuple(values[:max_col] if max_col is not None else values))
+        return result
+
+    def row(self, sheet: str, row_num: int) -> tuple:
+        """Values of one row (empty if it is not stored)."""
+        found = self.conn.execute(
+            "SELECT data FROM sheet_rows WHERE sheet = ? AND row_num = ?", (sheet, row_num)
+        ).fetchone()
+        return tuple(json.loads(found[0], object_hook=_decode_value)) if found else ()
+
+    def header(self, sheet: str) -> tuple:
+        return self.row(sheet, 1)
+
+    def ids(self, sheet: str) -> Set[str]:
+        """Normalized IDs of the sheet's data rows."""
+        return {
+            r[0] for r in self.conn.execute(
+                "SELECT DISTINCT id_key FROM sheet_rows WHERE sheet = ? AND row_num >= 2 AND id_key IS NOT NULL", (sheet,)
+            )
+        }
+
+    def has_id(self, sheet: str, id_value) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sheet_rows WHERE sheet = ? AND id_key = ? AND row_num >= 2 LIMIT 1", (sheet, normalize(id_value))
+        ).fetchone() is not None
+
+    def has_combo(self, sheet: str, combo: Sequence[str]) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sheet_rows WHERE sheet = ? AND combo_key = ? LIMIT 1", (sheet, combo_key(combo))
+        ).fetchone() is not None
+
+    def id_counts(self, id_values: Iterable[int]) -> Dict[str, Dict[int, int]]:
+        """{sheet: {ID: data rows}} for the given integer IDs, over every sheet (cells compared by numeric_id())."""
+        counts: Dict[str, Dict[int, int]] = {}
+        for id_value in id_values:
+            for sheet, count in self.conn.execute(
+                "SELECT sheet, COUNT(*) FROM sheet_rows WHERE id_num = ? AND row_num >= 2 GROUP BY sheet",
+                (int(id_value),),
+            ):
+                counts.setdefault(sheet, {})[int(id_value)] = count
+        return counts
+
+    # ----- writes (call after the same change was saved to the workbook) -----
+    def _insert_rows(self, sheet: str, numbered_rows: Iterable[Tuple[int, Sequence]]) -> None:
+        header = self.header(sheet)
+        id_col = _id_column(header)
+        indices = composite_indices(header) if sheet in COMPOSITE_SHEETS else []
+        for row_num, row in numbered_rows:
+            if row_num == 1:
+                header = tuple(row)
+                id_col = _id_column(header)
+                indices = composite_indices(header) if sheet in COMPOSITE_SHEETS else []
+            id_key = id_num = combo = None
+            if row_num >= 2 and row:
+                id_cell = row[id_col] if id_col < len(row) else None
+                id_key = normalize(id_cell) or None
+                id_num = numeric_id(id_cell)
+                if sheet in COMPOSITE_SHEETS:
+                    combo = combo_key(row_combo(row, indices))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sheet_rows (sheet, row_num, id_key, id_num, combo_key, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (sheet, row_num, id_key, id_num, combo,
+                 json.dumps(_trimmed(row), ensure_ascii=False, default=_encode_value)),
+            )
+
+    def _ensure_sheet(self, sheet: str) -> None:
+        if not self.has_sheet(sheet):
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM sheets").fetchone()[0]
+            self.conn.execute("INSERT INTO sheets (name, position) VALUES (?, ?)", (sheet, position))
+
+    def put_rows(self, sheet: str, rows: Dict[int, Sequence]) -> None:
+        """Store whole rows by row number (e.g. rows appended to the worksheet)."""
+        with self.conn:
+            self._ensure_sheet(sheet)
+            if 1 in rows:
+                self._insert_rows(sheet, [(1, rows[1])])
+                self._reindex(sheet)
+            self._insert_rows(sheet, sorted((n, r) for n, r in rows.items() if n != 1))
+            self._record_signature()
+
+    def set_cells(self, sheet: str, cells: Dict[Tuple[int, int], object]) -> None:
+        """Store single cell values, keyed by (row, column) as in ws.cell(row=..., column=...)."""
+        rows: Dict[int, list] = {}
+        for (row_num, column), value in cells.items():
+            if row_num not in rows:
+                rows[row_num] = list(self.row(sheet, row_num))
+            row = rows[row_num]
+            row.extend([None] * (column - len(row)))
+            row[column - 1] = value
+        self.put_rows(sheet, rows)
+
+    def replace_rows(self, sheet: str, rows: Sequence[Sequence], min_row: int = 2) -> None:
+        """Drop every row from `min_row` on and store `rows` there instead (rows above are kept)."""
+        with self.conn:
+            self._ensure_sheet(sheet)
+            self.conn.execute("DELETE FROM sheet_rows WHERE sheet = ? AND row_num >= ?", (sheet, min_row))
+            self._insert_rows(sheet, enumerate(rows, start=min_row))
+            self._record_signature()
+
+    def delete_ids(self, id_values: Iterable[int]) -> int:
+        """
+        Delete the data rows of the given integer IDs (cells compared by numeric_id()) from every sheet,
+        moving later rows up. Returns rows deleted.
+        """
+        keys = sorted({int(v) for v in id_values})
+        deleted = 0
+        with self.conn:
+            for sheet in self.sheet_names():
+                doomed = [
+                    r[0] for r in self.conn.execute(
+                        f"SELECT row_num FROM sheet_rows WHERE sheet = ? AND row_num >= 2 AND id_num IN ({','.join('?' * len(keys))})",
+                        (sheet, *keys),
+                    )
+                ] if keys else []
+                if not doomed:
+                    continue
+                doomed_set = set(doomed)
+                kept = [row for num, row in enumerate(self.rows(sheet, min_row=2), start=2) if num not in doomed_set]
+                self.conn.execute("DELETE FROM sheet_rows WHERE sheet = ? AND row_num >= 2", (sheet,))
+                self._insert_rows(sheet, enumerate(kept, start=2))
+                deleted += len(doomed)
+        return deleted
+
+    def _reindex(self, sheet: str) -> None:
+        """Recompute the ID and composite keys of every data row (after the header row changed)."""
+        data_rows = self.rows(sheet, min_row=2)
+        self.conn.execute("DELETE FROM sheet_rows WHERE sheet = ? AND row_num >= 2", (sheet,))
+        self._insert_rows(sheet, enumerate(data_rows, start=2))
+
+
+def open_store(workbook_path: str = MASTER_PATH) -> MasterStore:
+    """Open the store, (re)loading it from the workbook if it is new or the workbook changed outside the pipeline."""
+    store = MasterStore()
+    if not store.is_current(workbook_path):
+        if store.is_loaded(workbook_path):
+            print(f"[INFO] {workbook_path} changed since the store last saw it; reloading the store.", flush=True)
+        store.import_workbook(workbook_path)
+    return store
+
+
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load Master.xlsx into the SQLite store, or export the store to Excel.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--import", dest="do_import", action="store_true", help="reload the store from Master.xlsx")
+    group.add_argument("--export", metavar="XLSX", help="write the stored sheets to this workbook")
+    args = parser.parse_args()
+    with MasterStore() as store:
+        if args.do_import:
+            store.import_workbook(MASTER_PATH)
+        else:
+            store.export_workbook(args.export)
+            print(f"[INFO] Exported {', '.join(store.sheet_names())} to {args.export}", flush=True)
@@ -0,0 +1,173 @@
+"""
+Month-partitioned Parquet copies of the extraction outputs (Raw Extract, ID to PD Mapping,
+Vendor Extraction), next to the Excel sheets the stages write.
+
+Each dataset is a folder of hive-style partitions, one per source month folder:
+  <PARQUET_DIR>/<dataset>/month=2026-01/part.parquet      (rows whose PIA arrived in "Jan 2026")
+  <PARQUET_DIR>/<dataset>/month=unknown/part.parquet      (ID not found in any month folder)
+A row's month is the earliest month folder holding a PDF with its ID (from the PDF catalog), so
+rows stay in their partition from run to run. A partition file is only rewritten when its rows
+changed (fingerprints in <dataset>/_manifest.json).
+
+Read what you need without opening Extract.xlsx:
+  read_dataset("Raw Extract", months=["2026-01"], columns=["ID", "Name"])
+Needs pyarrow; without it the Parquet copies are skipped with a warning.
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from pdf_catalog import BASE_DIR, MONTH_FOLDER_RE, open_catalog
+
+# ========= USER CONFIG =========
+PARQUET_DIR = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\parquet"
+
+UNKNOWN_MONTH = "unknown"
+MANIFEST_NAME = "_manifest.json"
+
+
+# ========= LOGGING =========
+def log(msg: str) -> None:
+    print(f"[INFO] {msg}")
+
+def warn(msg: str) -> None:
+    print(f"[WARN] {msg}", file=sys.stderr)
+
+
+# ========= MONTHS =========
+def month_key(folder_name: str) -> Optional[str]:
+    """'Jan 2026' / 'January 2026' -> '2026-01' (None if the name is not a month folder)."""
+    if not MONTH_FOLDER_RE.match(folder_name):
+        return None
+    month, year = folder_name.split()
+    return datetime.datetime.strptime(f"{month[:3].title()} {year}", "%b %Y").strftime("%Y-%m")
+
+
+def id_months(base_dir: str = BASE_DIR) -> Dict[str, str]:
+    """{PDF ID: 'YYYY-MM' of the earliest month folder under base_dir that holds a PDF with that ID}."""
+    months = []
+    if os.path.isdir(base_dir):
+        for name in os.listdir(base_dir):
+            path = os.path.join(base_dir, name)
+            key = month_key(name)
+            if key and os.path.isdir(path):
+                months.append((key, path))
+    mapping: Dict[str, str] = {}
+    with open_catalog(refresh=False) as catalog:
+        for key, path in sorted(months):
+            for _, _, pdf_id in catalog.files(path, recursive=True):
+                if pdf_id:
+                    mapping.setdefault(pdf_id, key)
+    return mapping
+
+
+def _id_text(val) -> str:
+    """ID cell as the digits a PDF filename carries (1001, 1001.0 and '1001' -> '1001')."""
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    return "" if pd.isna(val) else str(val).strip()
+
+
+# ========= WRITE =========
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column names as unique text (repeats get '.1', '.2', ... as pd.read_excel names them), and object
+    columns holding mixed types as text, so Parquet accepts them.
+    """
+    df = df.copy()
+    names: List[str] = []
+    for col in df.columns:
+        name, n = str(col), 0
+        while name in names:
+            n += 1
+            name = f"{col}.{n}"
+        names.append(name)
+    df.columns = names
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col].dropna()
+            if not values.map(lambda v: isinstance(v, str)).all():
+                df[col] = df[col].map(lambda v: v if pd.isna(v) or isinstance(v, str) else str(v)).astype(object)
+    return df
+
+
+def _fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.sha256(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def write_dataset(df: pd.DataFrame, dataset: str, id_col: str = "ID", months: Optional[Dict[str, str]] = None,
+                  root: str = PARQUET_DIR) -> None:
+    """
+    Write `df` as <root>/<dataset>/month=<YYYY-MM>/part.parquet, one partition per source month.
+    months: {ID: 'YYYY-MM'} (default: id_months()). Unchanged partitions are left as they are.
+    """
+    try:
+        import pyarrow  # noqa: F401  (pandas' Parquet engine)
+    except ImportError:
+        warn(f"pyarrow is not installed; Parquet copy of '{dataset}' skipped.")
+        return
+    if months is None:
+        months = id_months()
+    if id_col not in df.columns:
+        id_col = df.columns[0]
+
+    dataset_dir = os.path.join(root, dataset)
+    os.makedirs(dataset_dir, exist_ok=True)
+    manifest_path = os.path.join(dataset_dir, MANIFEST_NAME)
+    manifest: Dict[str, str] = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+
+    part_of_row = df[id_col].map(lambda v: months.get(_id_text(v), UNKNOWN_MONTH))
+    safe_df = _arrow_safe(df)
+    written = 0
+    new_manifest: Dict[str, str] = {}
+    for month, part in safe_df.groupby(part_of_row.values, sort=True):
+        part = part.reset_index(drop=True)
+        fingerprint = _fingerprint(part)
+        new_manifest[month] = fingerprint
+        part_dir = os.path.join(dataset_dir, f"month={month}")
+        part_path = os.path.join(part_dir, "part.parquet")
+        if manifest.get(month) == fingerprint and os.path.exists(part_path):
+            continue
+        os.makedirs(part_dir, exist_ok=True)
+        tmp_path = part_path + ".tmp"
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+        written += 1
+
+    # Months that no longer have rows
+    for month in set(manifest) - set(new_manifest):
+        shutil.rmtree(os.path.join(dataset_dir, f"month={month}"), ignore_errors=True)
+
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(new_manifest, fh, indent=2, sort_keys=True)
+    log(f"Parquet '{dataset}': {len(df)} row(s) in {len(new_manifest)} month partition(s), {written} rewritten.")
+
+
+# ========= READ =========
+def read_dataset(dataset: str, months: Optional[Iterable[str]] = None, columns: Optional[Sequence[str]] = None,
+                 root: str = PARQUET_DIR) -> pd.DataFrame:
+    """Rows of the given months ('YYYY-MM' or 'unknown'; default all), only the given columns."""
+    dataset_dir = os.path.join(root, dataset)
+    if months is None:
+        months = [name.split("=", 1)[1] for name in sorted(os.listdir(dataset_dir)) if name.startswith("month=")]
+    parts: List[pd.DataFrame] = []
+    for month in months:
+        part_path = os.path.join(dataset_dir, f"month={month}", "part.parquet")
+        if os.path.exists(part_path):
+            part = pd.read_parquet(part_path, columns=list(columns) if columns is not None else None)
+            part["month"] = month
+            parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=[*(columns or []), "month"])
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,326 @@
+"""
+Persistent SQLite catalog of every PIA PDF: ID -> path, size, mtime, content hash, page count.
+
+All scripts look PDFs up here instead of listing folders and parsing filenames themselves.
+The catalog is refreshed incrementally: a directory is only re-listed when its mtime changed
+since the last scan (adding, removing or renaming a file updates it), so an unchanged archive
+costs one stat per directory. Content hash and page count are filled in lazily and re-validated
+against the file's size and mtime before they are returned.
+"""
+import os
+import re
+import sqlite3
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_text_cache import file_digest, get_page_texts
+
+# ========= USER CONFIG =========
+BASE_DIR = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate"
+CATALOG_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\pdf_catalog.sqlite"
+CONSOLIDATED_DIR = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Consolidatedpdfs"
+# Monthly export folder being processed: read by Monthlyfoldercheck_create.py and
+# Consolidated_MasterExcel_Create.py, and watched by pipeline.py (change the month here only)
+MONTH_FOLDER = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\Jan 2026"
+PIAS_ALL_UP_DIR = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & CyberSecurity\Privacy\PIA Files\T-Ads PIAs Automation\PIAs All Up"
+
+# Monthly export folders under BASE_DIR, e.g. "Jan 2026"
+MONTH_FOLDER_RE = re.compile(r"^(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}$", re.IGNORECASE)
+
+# Matches ..._{ID}.pdf OR ...  _{ID}.pdf (optional space before underscore), case-insensitive
+ID_SUFFIX_PATTERN = re.compile(r"(?:\s)?_(\d+)\.pdf$", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    dir_key TEXT PRIMARY KEY,
+    path    TEXT NOT NULL,
+    parent  TEXT,
+    mtime   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS pdfs (
+    path_key TEXT PRIMARY KEY,
+    path     TEXT NOT NULL,
+    dir_key  TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    pdf_id   TEXT,
+    size     INTEGER NOT NULL,
+    mtime    REAL NOT NULL,
+    sha256   TEXT,
+    pages    INTEGER
+);
+CREATE INDEX IF NOT EXISTS pdfs_id ON pdfs (pdf_id);
+CREATE INDEX IF NOT EXISTS pdfs_dir ON pdfs (dir_key);
+"""
+
+
+def pdf_id_from_filename(filename: str) -> Optional[str]:
+    """Trailing numeric ID of a PDF filename ('Some Name _12345.pdf' -> '12345'), or None."""
+    m = ID_SUFFIX_PATTERN.search(filename)
+    return m.group(1) if m else None
+
+
+def normalize_name(name: str) -> str:
+    """Name as compared between filenames and Master names: lower-cased, slashes as '_', trimmed."""
+    return name.lower().replace('/', '_').replace('\\', '_').strip()
+
+
+def name_prefix(filename: str) -> str:
+    """Normalized name part of a PDF filename: the text before the last '_' ('Name _123.pdf' -> 'name')."""
+    return normalize_name(filename[:filename.rfind("_")].rstrip())
+
+
+def _key(path: str) -> str:
+    """Comparison key for a path (absolute, case-normalized on Windows)."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def default_roots() -> List[str]:
+    """Consolidatedpdfs, PIAs All Up and every month folder under BASE_DIR."""
+    roots = [CONSOLIDATED_DIR, PIAS_ALL_UP_DIR]
+    if os.path.isdir(BASE_DIR):
+        for name in sorted(os.listdir(BASE_DIR)):
+            path = os.path.join(BASE_DIR, name)
+            if MONTH_FOLDER_RE.match(name) and os.path.isdir(path):
+                roots.append(path)
+    return roots
+
+
+class PdfCatalog:
+    """SQLite-backed PDF catalog. Use open_catalog() to get one refreshed over the default roots."""
+
+    def __init__(self, db_path: str = CATALOG_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(_SCHEMA)
+        self._refreshed: set = set()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PdfCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ----- refresh -----
+    def refresh(self, roots: Optional[Iterable[str]] = None) -> None:
+        """Bring the catalog up to date for `roots` (default: default_roots()), re-listing only changed dirs."""
+        with self.conn:
+            for root in (default_roots() if roots is None else roots):
+                root_key = _key(root)
+                if not os.path.isdir(root):
+                    self._drop_tree(root_key)
+                    continue
+                row = self.conn.execute("SELECT parent FROM dirs WHERE dir_key = ?", (root_key,)).fetchone()
+                self._refresh_dir(root, root_key, parent=row[0] if row else None)
+                self._refreshed.add(root_key)
+
+    def _refresh_dir(self, path: str, dir_key: str, parent: Optional[str]) -> None:
+        mtime = os.stat(path).st_mtime
+        row = self.conn.execute("SELECT mtime FROM dirs WHERE dir_key = ?", (dir_key,)).fetchone()
+        if row is not None and row[0] == mtime:
+            # Unchanged listing: only descend into the subdirectories we already know about
+            subdirs = self.conn.execute("SELECT path, dir_key FROM dirs WHERE parent = ?", (dir_key,)).fetchall()
+            for sub_path, sub_key in subdirs:
+                if os.path.isdir(sub_path):
+                    self._refresh_dir(sub_path, sub_key, dir_key)
+                else:
+                    self._drop_tree(sub_key)
+            return
+
+        known = {
+            r[0]: (r[1], r[2])
+            for r in self.conn.execute("SELECT path_key, size, mtime FROM pdfs WHERE dir_key = ?", (dir_key,))
+        }
+        known_subdirs = {r[0] for r in self.conn.execute("SELECT dir_key FROM dirs WHERE parent = ?", (dir_key,))}
+        seen_files: set = set()
+        seen_subdirs: set = set()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    sub_key = _key(entry.path)
+                    seen_subdirs.add(sub_key)
+                    self._refresh_dir(entry.path, sub_key, dir_key)
+                elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    st = entry.stat()
+                    path_key = _key(entry.path)
+                    seen_files.add(path_key)
+                    if known.get(path_key) == (st.st_size, st.st_mtime):
+                        continue
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO pdfs (path_key, path, dir_key, filename, pdf_id, size, mtime, sha256, pages) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+                        (path_key, entry.path, dir_key, entry.name, pdf_id_from_filename(entry.name), st.st_size, st.st_mtime),
+                    )
+        for gone in set(known) - seen_files:
+            self.conn.execute("DELETE FROM pdfs WHERE path_key = ?", (gone,))
+        for gone in known_subdirs - seen_subdirs:
+            self._drop_tree(gone)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO dirs (dir_key, path, parent, mtime) VALUES (?, ?, ?, ?)",
+            (dir_key, path, parent, mtime),
+        )
+
+    def _drop_tree(self, dir_key: str) -> None:
+        for (sub_key,) in self.conn.execute("SELECT dir_key FROM dirs WHERE parent = ?", (dir_key,)).fetchall():
+            self._drop_tree(sub_key)
+        self.conn.execute("DELETE FROM pdfs WHERE dir_key = ?", (dir_key,))
+        self.conn.execute("DELETE FROM dirs WHERE dir_key = ?", (dir_key,))
+
+    def forget(self, path: str) -> None:
+        """Drop a file the caller just deleted, without waiting for the next refresh."""
+        with self.conn:
+            self.conn.execute("DELETE FROM pdfs WHERE path_key = ?", (_key(path),))
+
+    def _ensure_fresh(self, folder: str) -> str:
+        folder_key = _key(folder)
+        if folder_key not in self._refreshed:
+            self.refresh([folder])
+        return folder_key
+
+    # ----- lookups -----
+    def files(self, folder: str, recursive: bool = False) -> List[Tuple[str, str, Optional[str]]]:
+        """[(path, filename, pdf_id)] for the PDFs in `folder` (and below, if recursive), sorted by path."""
+        folder_key = self._ensure_fresh(folder)
+        if recursive:
+            prefix = folder_key.rstrip(os.sep) + os.sep
+            rows = self.conn.execute(
+                "SELECT path, filename, pdf_id FROM pdfs WHERE dir_key = ? OR substr(dir_key, 1, ?) = ? ORDER BY path",
+                (folder_key, len(prefix), prefix),
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT path, filename, pdf_id FROM pdfs WHERE dir_key = ? ORDER BY path", (folder_key,)
+            )
+        return rows.fetchall()
+
+    def id_map(self, folder: str, recursive: bool = False) -> Dict[str, List[str]]:
+        """{pdf_id: [paths]} for `folder`; build it once per run and look IDs up in O(1)."""
+        mapping: Dict[str, List[str]] = {}
+        for path, _, pdf_id in self.files(folder, recursive):
+            if pdf_id:
+                mapping.setdefault(pdf_id, []).append(path)
+        return mapping
+
+    def paths_for_id(self, pdf_id: str, folder: Optional[str] = None) -> List[str]:
+        """All catalogued paths for one ID (indexed lookup), optionally limited to one folder."""
+        if folder is None:
+            rows = self.conn.execute("SELECT path FROM pdfs WHERE pdf_id = ? ORDER BY path", (str(pdf_id),))
+        else:
+            rows = self.conn.execute(
+                "SELECT path FROM pdfs WHERE pdf_id = ? AND dir_key = ? ORDER BY path",
+                (str(pdf_id), self._ensure_fresh(folder)),
+            )
+        return [r[0] for r in rows]
+
+    def resolver(self, folder: str, recursive: bool = False) -> "FilenameResolver":
+        """A FilenameResolver over the PDFs of `folder`; build it once per run."""
+        return FilenameResolver(self.files(folder, recursive))
+
+    # ----- lazily computed details -----
+    def _current_row(self, path: str):
+        """Stored (sha256, pages) for `path`, or (None, None) if the file changed since it was catalogued."""
+        st = os.stat(path)
+        path_key = _key(path)
+        row = self.conn.execute("SELECT size, mtime, sha256, pages FROM pdfs WHERE path_key = ?", (path_key,)).fetchone()
+        if row is None or (row[0], row[1]) != (st.st_size, st.st_mtime):
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pdfs (path_key, path, dir_key, filename, pdf_id, size, mtime, sha256, pages) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+                    (path_key, path, _key(os.path.dirname(path)), os.path.basename(path),
+                     pdf_id_from_filename(os.path.basename(path)), st.st_size, st.st_mtime),
+                )
+            return path_key, None, None
+        return path_key, row[2], row[3]
+
+    def digest(self, path: str) -> str:
+        """SHA-256 of the file contents, computed once per file version."""
+        path_key, sha256, _ = self._current_row(path)
+        if sha256 is None:
+            sha256 = file_digest(path)
+            with self.conn:
+                self.conn.execute("UPDATE pdfs SET sha256 = ? WHERE path_key = ?", (sha256, path_key))
+        return sha256
+
+    def page_count(self, path: str) -> int:
+        """Number of pages, taken from the PDF text cache (parsing the file at most once)."""
+        path_key, _, pages = self._current_row(path)
+        if pages is None:
+            pages = len(get_page_texts(path, self.digest(path)))
+            with self.conn:
+                self.conn.execute("UPDATE pdfs SET pages = ? WHERE path_key = ?", (pages, path_key))
+        return pages
+
+
+class FilenameResolver:
+    """
+    Picks the PDF for an ID when several files carry it, preferring the file whose name prefix best
+    matches a name hint (Master column B):
+      exact prefix > one starts with the other > one contains the other > first file (catalog order)
+    Built once from catalog.files(): per ID, the normalized prefixes are kept sorted, so the exact and
+    starts-with matches are binary searches rather than a rescoring of every candidate, and each
+    (ID, hint) is resolved only once.
+    """
+
+    def __init__(self, files: Iterable[Tuple[str, str, Optional[str]]]):
+        by_id: Dict[str, List[Tuple[str, int, str]]] = {}
+        for rank, (path, filename, pdf_id) in enumerate(files):
+            if pdf_id:
+                by_id.setdefault(pdf_id.lower(), []).append((name_prefix(filename), rank, path))
+        # Per ID: (prefix, catalog rank, path) sorted by prefix, and the prefixes alone for bisect
+        self._entries = {pdf_id: sorted(entries) for pdf_id, entries in by_id.items()}
+        self._prefixes = {pdf_id: [e[0] for e in entries] for pdf_id, entries in self._entries.items()}
+        self._resolved: Dict[Tuple[str, str], str] = {}
+
+    def __len__(self) -> int:
+        """Number of PDFs with an ID suffix."""
+        return sum(len(entries) for entries in self._entries.values())
+
+    def paths(self, pdf_id: str) -> List[str]:
+        """Every path for the ID, in catalog order."""
+        entries = self._entries.get(str(pdf_id).lower(), [])
+        return [path for _, _, path in sorted(entries, key=lambda e: e[1])]
+
+    def resolve(self, pdf_id: str, name_hint: Optional[str] = None) -> Optional[str]:
+        """Path of the best file for the ID (None if no file carries it)."""
+        pdf_id = str(pdf_id).lower()
+        entries = self._entries.get(pdf_id)
+        if not entries:
+            return None
+        if len(entries) == 1 or not name_hint:
+            return min(entries, key=lambda e: e[1])[2]
+        hint = normalize_name(name_hint)
+        cached = self._resolved.get((pdf_id, hint))
+        if cached is None:
+            cached = self._resolved[(pdf_id, hint)] = self._best_match(entries, self._prefixes[pdf_id], hint)
+        return cached
+
+    @staticmethod
+    def _best_match(entries: List[Tuple[str, int, str]], prefixes: List[str], hint: str) -> str:
+        def first(group):
+            return min(group, key=lambda e: e[1])[2]
+
+        lo, hi = bisect_left(prefixes, hint), bisect_right(prefixes, hint)
+        if lo < hi:
+            return first(entries[lo:hi])
+        # Prefixes starting with the hint form one sorted range; prefixes of the hint are looked up one by one
+        group = entries[lo:bisect_left(prefixes, hint + "\U0010ffff")]
+        for n in range(len(hint)):
+            group += entries[bisect_left(prefixes, hint[:n]):bisect_right(prefixes, hint[:n])]
+        if group:
+            return first(group)
+        return first([e for e in entries if hint in e[0] or e[0] in hint] or entries)
+
+
+def open_catalog(refresh: bool = True) -> PdfCatalog:
+    """Open the shared catalog and (by default) refresh it over Consolidatedpdfs, PIAs All Up and month folders."""
+    catalog = PdfCatalog()
+    if refresh:
+        catalog.refresh()
+    return catalog
@@ -0,0 +1,129 @@
+"""
+Incremental PDF publishing from Consolidatedpdfs to the SharePoint-synced PIAs All Up folder.
+
+Copying every PDF on every run makes OneDrive re-upload the whole archive. A manifest records,
+per published file, the source and destination size + mtime and the content hash behind the
+last copy. A file is copied only when it is missing from the destination or its content differs:
+  - source and destination unchanged since the manifest entry -> skipped without reading them
+  - otherwise the content hashes (PDF catalog, computed once per file version) are compared
+Copies run on a small thread pool (they are I/O bound) and the run reports its throughput.
+"""
+import os
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pdf_catalog import open_catalog
+
+# ========= USER CONFIG =========
+MANIFEST_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\publish_manifest.sqlite"
+
+# Files copied at the same time
+PUBLISH_WORKERS = 4
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class PublishResult(NamedTuple):
+    new: int
+    updated: int
+    unchanged: int
+    total_in_dest: int
+    bytes_copied: int
+    seconds: float
+
+
+class PublishManifest:
+    """Per destination file: source size/mtime, destination size/mtime and sha256 as of its last publish."""
+
+    def __init__(self, db_path: str = MANIFEST_PATH):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS published ("
+            " dest_key TEXT PRIMARY KEY, src_size INTEGER NOT NULL, src_mtime REAL NOT NULL,"
+            " dest_size INTEGER NOT NULL, dest_mtime REAL NOT NULL, sha256 TEXT NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PublishManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, dest_path: str) -> Optional[Tuple[int, float, int, float, str]]:
+        return self.conn.execute(
+            "SELECT src_size, src_mtime, dest_size, dest_mtime, sha256 FROM published WHERE dest_key = ?",
+            (_key(dest_path),),
+        ).fetchone()
+
+    def save(self, records: Dict[str, Tuple[int, float, int, float, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO published (dest_key, src_size, src_mtime, dest_size, dest_mtime, sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(_key(path), *record) for path, record in records.items()],
+            )
+
+
+def _stats(src_path: str, dest_path: str) -> Tuple[int, float, int, float]:
+    src_st, dest_st = os.stat(src_path), os.stat(dest_path)
+    return src_st.st_size, src_st.st_mtime, dest_st.st_size, dest_st.st_mtime
+
+
+def publish_pdfs(source_dir: str, dest_dir: str, recursive: bool = True, workers: int = PUBLISH_WORKERS) -> PublishResult:
+    """Copy the new or changed .pdf files under source_dir into dest_dir (flat)."""
+    os.makedirs(dest_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    with open_catalog(refresh=False) as catalog, PublishManifest() as manifest:
+        # Last file wins when two source folders hold the same filename, as with sequential copies
+        sources: Dict[str, str] = {}
+        for src_path, filename, _ in catalog.files(source_dir, recursive=recursive):
+            sources[filename] = src_path
+
+        to_copy: List[Tuple[str, str, str]] = []  # (source, destination, sha256)
+        records: Dict[str, Tuple[int, float, int, float, str]] = {}
+        new_count = updated_count = unchanged_count = 0
+        for filename, src_path in sources.items():
+            dest_path = os.path.join(dest_dir, filename)
+            if not os.path.exists(dest_path):
+                new_count += 1
+                to_copy.append((src_path, dest_path, catalog.digest(src_path)))
+                continue
+            stats = _stats(src_path, dest_path)
+            record = manifest.get(dest_path)
+            if record is not None and tuple(record[:4]) == stats:
+                # Neither side changed since the last publish: no need to read them
+                unchanged_count += 1
+                continue
+            sha256 = catalog.digest(src_path)
+            if stats[0] == stats[2] and catalog.digest(dest_path) == sha256:
+                unchanged_count += 1
+                records[dest_path] = (*stats, sha256)
+            else:
+                updated_count += 1
+                to_copy.append((src_path, dest_path, sha256))
+
+        # Copies are I/O bound: run a few at a time (the catalog and manifest stay on this thread)
+        bytes_copied = 0
+        with ThreadPoolExecutor(max(1, workers)) as pool:
+            copied = pool.map(lambda task: shutil.copy2(task[0], task[1]), to_copy)
+            for (src_path, dest_path, sha256), _ in zip(to_copy, copied):
+                stats = _stats(src_path, dest_path)
+                bytes_copied += stats[0]
+                records[dest_path] = (*stats, sha256)
+        manifest.save(records)
+
+    total_in_dest = len([f for f in os.listdir(dest_dir) if f.lower().endswith(".pdf")])
+    return PublishResult(new_count, updated_count, unchanged_count, total_in_dest, bytes_copied,
+                         time.perf_counter() - started)
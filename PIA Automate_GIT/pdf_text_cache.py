@@ -0,0 +1,140 @@
+"""
+Persistent, content-addressed cache of per-page PDF text.
+
+Every extraction script reads the same PDFs from Consolidatedpdfs. Instead of running
+PyPDF2 over each file on every run, page text is stored once under CACHE_DIR, keyed by
+the SHA-256 of the file contents plus EXTRACTOR_VERSION. Entries are zlib-compressed
+JSON lists (one string per page), so an unchanged PDF is parsed once in its lifetime.
+Callers that stop reading early leave a partial entry holding the leading pages only.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import PyPDF2
+from PyPDF2 import PdfReader
+
+# ========= USER CONFIG =========
+CACHE_DIR = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\PdfTextCache"
+
+# Bump the trailing number whenever the way page text is produced changes;
+# entries written by an older extractor are then ignored and rebuilt.
+EXTRACTOR_VERSION = f"pypdf2-{PyPDF2.__version__}-1"
+
+_HASH_CHUNK = 1 << 20
+
+# path -> (size, mtime, digest); avoids re-hashing the same file within one process
+_digest_memo: Dict[str, Tuple[int, float, str]] = {}
+
+
+def warn(msg: str) -> None:
+    print(f"[WARN] {msg}", file=sys.stderr)
+
+
+# ========= HASHING =========
+def file_digest(pdf_path: str) -> str:
+    """SHA-256 hex digest of the file contents (memoized per process on size + mtime)."""
+    st = os.stat(pdf_path)
+    memo = _digest_memo.get(pdf_path)
+    if memo and memo[0] == st.st_size and memo[1] == st.st_mtime:
+        return memo[2]
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digest_memo[pdf_path] = (st.st_size, st.st_mtime, digest)
+    return digest
+
+
+# ========= CACHE STORAGE =========
+def _cache_path(digest: str) -> str:
+    """Entries are fanned out by the first two hex digits to keep directories small."""
+    return os.path.join(CACHE_DIR, digest[:2], f"{digest}_{EXTRACTOR_VERSION}.json.z")
+
+
+def _load(path: str) -> Optional[Tuple[List[str], bool]]:
+    """Return (page_texts, complete) for a cache entry, or None if there is none."""
+    try:
+        with open(path, "rb") as fh:
+            data = json.loads(zlib.decompress(fh.read()).decode("utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, zlib.error) as e:
+        warn(f"Ignoring unreadable cache entry '{path}': {e}")
+        return None
+    if isinstance(data, list):
+        return data, True
+    if isinstance(data, dict) and isinstance(data.get("pages"), list):
+        # Leading pages of a document that was only partly read (see iter_page_texts)
+        return data["pages"], False
+    return None
+
+
+def _store(path: str, pages: List[str], complete: bool = True) -> None:
+    """Write via a temp file + rename so concurrent readers never see a partial entry."""
+    payload = pages if complete else {"pages": pages}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per process and thread: pipeline.py runs stages as threads of one process
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 6))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        warn(f"Could not write cache entry '{path}': {e}")
+
+
+# ========= EXTRACTION =========
+def iter_page_texts(pdf_path: str, digest: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the text of each page of `pdf_path` in order (empty string for pages without text),
+    parsing a page only when the caller asks for it. Cached pages are served first; if the
+    caller stops early, the pages parsed so far are cached as a partial entry and a later
+    call continues from there. A page that fails to extract is yielded as "" and it and the
+    pages after it are not cached, so they are retried next run.
+    Raises whatever PdfReader raises if the file has to be opened and cannot be.
+    """
+    digest = digest or file_digest(pdf_path)
+    path = _cache_path(digest)
+    cached, complete = _load(path) or ([], False)
+    yield from cached
+    if complete:
+        return
+
+    reader = PdfReader(pdf_path)
+    page_count = len(reader.pages)
+    pages: List[str] = list(cached)
+    failed_at: Optional[int] = None
+    try:
+        for page_idx in range(len(cached), page_count):
+            try:
+                text = reader.pages[page_idx].extract_text() or ""
+            except Exception as e:
+                warn(f"Failed to extract text from page {page_idx} in '{pdf_path}': {e}")
+                text = ""
+                if failed_at is None:
+                    failed_at = page_idx
+            pages.append(text)
+            yield text
+    finally:
+        # Runs on normal completion and when the caller closes the generator early
+        good = pages if failed_at is None else pages[:failed_at]
+        finished = failed_at is None and len(pages) == page_count
+        if finished or len(good) > len(cached):
+            _store(path, good, finished)
+
+
+def get_page_texts(pdf_path: str, digest: Optional[str] = None) -> List[str]:
+    """
+    Return the text of every page of `pdf_path` (empty string for pages without text).
+    Served from the cache when the file contents were seen before; otherwise the PDF is
+    parsed and the result stored. Pages that fail to extract are returned as "" and are
+    not cached, so the file is retried next run.
+    Raises whatever PdfReader raises if the file cannot be opened.
+    """
+    return list(iter_page_texts(pdf_path, digest))
@@ -0,0 +1,184 @@
+"""
+Shared helpers for the Raw Extract question/response text extraction (extraction_rules.py).
+"""
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pdf_text_cache import EXTRACTOR_VERSION
+
+# ========= USER CONFIG =========
+STATE_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\extraction_state.sqlite"
+
+
+# ========= PHRASE SEARCH =========
+@lru_cache(maxsize=None)
+def _compile_phrases(phrases: Tuple[str, ...]) -> Tuple[re.Pattern, Tuple[str, ...]]:
+    """
+    Compile all phrases into one alternation (longest first, so a longer phrase wins over
+    a shorter one starting at the same position). Also return the phrases that occur inside
+    another phrase: those can be hidden by the longer match and are looked up directly.
+    """
+    ordered = sorted(set(phrases), key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(p) for p in ordered))
+    nested = tuple(p for p in ordered if any(p != q and p in q for q in ordered))
+    return pattern, nested
+
+
+def find_phrases(text: str, phrases: Sequence[str]) -> Dict[str, int]:
+    """
+    Return {phrase: index of its first occurrence} for every phrase present in `text`,
+    using a single scan of the text for all phrases together.
+    """
+    pattern, nested = _compile_phrases(tuple(phrases))
+    remaining = set(phrases) - set(nested)
+    positions: Dict[str, int] = {}
+    for m in pattern.finditer(text):
+        positions.setdefault(m.group(0), m.start())
+        remaining.discard(m.group(0))
+        if not remaining:
+            break
+    for phrase in nested:
+        idx = text.find(phrase)
+        if idx != -1:
+            positions[phrase] = idx
+    return positions
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile a (stop) pattern once per process instead of on every PDF."""
+    return re.compile(pattern, flags)
+
+
+# ========= EARLY-TERMINATING PAGE READS =========
+# Extra characters required after a stop match before a Response window counts as closed: a
+# longer stop alternative or more digits of a section number could otherwise still extend into
+# the next page and start earlier.
+STOP_MARGIN = 32
+
+
+def read_pages_until(page_texts: Iterable[str], add_page: Callable[[str], bool]) -> str:
+    """
+    Read non-empty pages one at a time, handing each to add_page(page text), and stop as soon
+    as it returns True; return the pages read, joined with newlines. add_page keeps whatever
+    state it needs, so each page is only looked at once. If it never returns True, the whole
+    document is read, so callers whose check only passes once nothing later can change their
+    result get exactly what the full text would give.
+    """
+    parts: List[str] = []
+    try:
+        for page_text in page_texts:
+            if not page_text:
+                continue
+            parts.append(page_text)
+            if add_page(page_text):
+                break
+    finally:
+        # Release the PDF (and let the page cache record what was read) right away
+        close = getattr(page_texts, "close", None)
+        if close is not None:
+            close()
+    return "\n".join(parts)
+
+
+# ========= PARALLEL EXTRACTION =========
+def _run_captured(func: Callable, task):
+    """Run one task in a worker, capturing its console output so the parent can print it in order."""
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        result = func(task)
+    return result, buf.getvalue()
+
+
+def run_in_pool(func: Callable, tasks: List, workers: int = 1) -> Iterator:
+    """
+    Yield func(task) for every task, in task order.
+    With workers > 1 the tasks are fanned out to a process pool; each task's printed output is
+    replayed in task order as its result arrives, so logs stay deterministic.
+    `func` must be a module-level function so it can be pickled.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result, output in pool.map(partial(_run_captured, func), tasks):
+            sys.stdout.write(output)
+            yield result
+
+
+# ========= INCREMENTAL EXTRACTION STATE =========
+def rules_version(*rules) -> str:
+    """
+    Fingerprint of a stage's extraction rules (phrases, stop strings, cleaners, revision number)
+    plus the PDF text extractor version. Any change re-extracts every row of that column.
+    """
+    payload = json.dumps([EXTRACTOR_VERSION, *rules], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ExtractionState:
+    """
+    Records, per (column, ID), the PDF content hash and rules version behind the value last
+    written to Raw Extract, so incremental runs only re-extract new/changed PDFs or rules.
+    """
+
+    def __init__(self, db_path: str = STATE_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS extracted ("
+            " col TEXT NOT NULL, id TEXT NOT NULL, sha256 TEXT NOT NULL, rules_version TEXT NOT NULL,"
+            " PRIMARY KEY (col, id))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS synced ("
+            " id TEXT PRIMARY KEY, master_fp TEXT NOT NULL, extract_fp TEXT NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ExtractionState":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def load(self, column: str) -> Dict[str, Tuple[str, str]]:
+        """{ID: (sha256, rules_version)} recorded for `column`."""
+        rows = self.conn.execute("SELECT id, sha256, rules_version FROM extracted WHERE col = ?", (column,))
+        return {r[0]: (r[1], r[2]) for r in rows}
+
+    def save(self, column: str, records: Dict[str, Tuple[str, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO extracted (col, id, sha256, rules_version) VALUES (?, ?, ?, ?)",
+                [(column, row_id, sha256, version) for row_id, (sha256, version) in records.items()],
+            )
+
+    def load_synced(self) -> Dict[str, Tuple[str, str]]:
+        """{ID: (master row fingerprint, Raw Extract row fingerprint)} of rows last found in sync."""
+        return {r[0]: (r[1], r[2]) for r in self.conn.execute("SELECT id, master_fp, extract_fp FROM synced")}
+
+    def save_synced(self, records: Dict[str, Tuple[str, str]], stale: Iterable[str] = ()) -> None:
+        with self.conn:
+            self.conn.executemany("DELETE FROM synced WHERE id = ?", [(row_id,) for row_id in stale])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO synced (id, master_fp, extract_fp) VALUES (?, ?, ?)",
+                [(row_id, master_fp, extract_fp) for row_id, (master_fp, extract_fp) in records.items()],
+            )
+
+
+def is_up_to_date(recorded: Dict[str, Tuple[str, str]], row_id: str, digest: Optional[str], version: str, value) -> bool:
+    """True if `value` was extracted from this exact PDF content with these rules and is still filled in."""
+    if digest is None or recorded.get(row_id) != (digest, version):
+        return False
+    return isinstance(value, str) and value.strip() != ""
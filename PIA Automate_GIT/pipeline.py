@@ -0,0 +1,255 @@
+"""
+Make-style runner for the monthly PIA pipeline, from Monthlyfoldercheck_create.py to stage 6.
+
+Each stage is one of the existing scripts, run in this process (runpy, as __main__) so pandas,
+the shared modules and the Extract.xlsx workbook session are loaded once for the whole run. The
+stages form a DAG through their upstream stages; a stage starts as soon as its upstream stages
+are done, so independent ones run side by side (e.g. 4.1 next to the Raw Extract extraction).
+Stages that write the same resource never overlap.
+
+A stage is skipped when no upstream stage ran in this run and the signature of its inputs
+(files / folders it reads, plus the pipeline code and rules files) equals the one recorded
+after its last successful run. Signatures use size + mtime, so checking is cheap.
+
+Usage:
+  python pipeline.py                    run what is out of date
+  python pipeline.py --dry-run          only show which stages would run
+  python pipeline.py --force            run every stage
+  python pipeline.py --pdf-workers 15   extract 15 PDFs at a time in the Raw Extract stage
+  python pipeline.py --incremental      only re-extract Raw Extract cells whose PDF or rules changed
+"""
+import argparse
+import hashlib
+import os
+import runpy
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from extraction_rules import EXTRACT_PATH, MASTER_PATH as CONSOLIDATED_MASTER_PATH, INCREMENTAL, PDF_WORKERS
+from pdf_catalog import CONSOLIDATED_DIR, MONTH_FOLDER, PIAS_ALL_UP_DIR
+from workbook_session import workbook_session
+
+# ========= USER CONFIG =========
+STATE_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\Documents\PIA Automate\pipeline_state.sqlite"
+SHAREPOINT_MASTER_PATH = r"C:\Users\PBalakr4\OneDrive - T-Mobile USA\T-Ads - Privacy & CyberSecurity\Privacy\PIA Files\T-Ads PIAs Automation\Master.xlsx"
+
+# Stages running at the same time (the Raw Extract extraction can also use its own process pool: --pdf-workers)
+MAX_PARALLEL_STAGES = 2
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ========= STAGES =========
+class Stage:
+    """
+    One pipeline script.
+      after        upstream stage scripts that must finish first (and force a re-run when they ran)
+      inputs       files / folders whose changes make the stage out of date
+      locks        resources the stage writes; stages sharing one never run at the same time
+      reads_files  workbooks the script opens from disk itself, so the shared session is saved first
+    """
+
+    def __init__(self, script: str, after: Sequence[str] = (), inputs: Sequence[str] = (),
+                 locks: Sequence[str] = (), reads_files: Sequence[str] = ()):
+        self.script = script
+        self.after = list(after)
+        self.inputs = list(inputs)
+        self.locks = set(locks)
+        self.reads_files = list(reads_files)
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(self.script)[0]
+
+
+STAGES: List[Stage] = [
+    Stage("Monthlyfoldercheck_create.py",
+          inputs=[MONTH_FOLDER], locks=["Consolidatedpdfs"]),
+    Stage("Consolidated_MasterExcel_Create.py",
+          inputs=[MONTH_FOLDER], locks=["Consolidated_Master.xlsx"]),
+    Stage("1-3 - Text Extraction-All.py",
+          after=["Monthlyfoldercheck_create.py", "Consolidated_MasterExcel_Create.py"],
+          inputs=[CONSOLIDATED_MASTER_PATH, CONSOLIDATED_DIR], locks=["Extract.xlsx/Raw Extract"]),
+    Stage("4.0 - ID to PD Mapping.py",
+          after=["1-3 - Text Extraction-All.py"],
+          inputs=[EXTRACT_PATH], locks=["Extract.xlsx/ID to PD Mapping"]),
+    Stage("4.1 - Vendor Extraction.py",
+          after=["Monthlyfoldercheck_create.py", "Consolidated_MasterExcel_Create.py"],
+          inputs=[CONSOLIDATED_MASTER_PATH, CONSOLIDATED_DIR], locks=["Extract.xlsx/Vendor Extraction"]),
+    Stage("5.0 - Upload to Master.py",
+          after=["1-3 - Text Extraction-All.py", "4.0 - ID to PD Mapping.py"],
+          inputs=[EXTRACT_PATH, SHAREPOINT_MASTER_PATH], locks=["Master.xlsx"], reads_files=[EXTRACT_PATH]),
+    Stage("5.1 - Upload Vendor details to Master.py",
+          after=["4.1 - Vendor Extraction.py"],
+          inputs=[EXTRACT_PATH, SHAREPOINT_MASTER_PATH], locks=["Master.xlsx"], reads_files=[EXTRACT_PATH]),
+    Stage("6 - Upload to PIAs All Up & pdf link creation.py",
+          after=["Monthlyfoldercheck_create.py", "5.0 - Upload to Master.py"],
+          inputs=[SHAREPOINT_MASTER_PATH, CONSOLIDATED_DIR, PIAS_ALL_UP_DIR], locks=["Master.xlsx", "PIAs All Up"]),
+]
+
+
+# ========= INPUT SIGNATURES =========
+def _path_entries(path: str) -> Iterable[str]:
+    """'relative path|size|mtime' for a file, or for every file below a folder."""
+    if os.path.isfile(path):
+        st = os.stat(path)
+        yield f"|{st.st_size}|{st.st_mtime_ns}"
+        return
+    if not os.path.isdir(path):
+        yield "missing"
+        return
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            yield f"{os.path.relpath(full, path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _code_paths() -> List[str]:
+    """The pipeline scripts, shared modules and rules files next to this file."""
+    return sorted(
+        os.path.join(SCRIPT_DIR, name) for name in os.listdir(SCRIPT_DIR)
+        if name.endswith((".py", ".json"))
+    )
+
+
+def input_signature(stage: Stage) -> str:
+    h = hashlib.sha256()
+    for path in [*stage.inputs, *_code_paths()]:
+        h.update(os.path.normcase(os.path.abspath(path)).encode("utf-8"))
+        for entry in _path_entries(path):
+            h.update(entry.encode("utf-8"))
+            h.update(b"\n")
+    return h.hexdigest()
+
+
+class PipelineState:
+    """Input signature per stage as of the end of its last successful run."""
+
+    def __init__(self, db_path: str = STATE_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages (name TEXT PRIMARY KEY, signature TEXT NOT NULL, finished_at TEXT NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PipelineState":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def signature(self, name: str) -> Optional[str]:
+        row = self.conn.execute("SELECT signature FROM stages WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, signatures: Dict[str, str]) -> None:
+        finished_at = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO stages (name, signature, finished_at) VALUES (?, ?, ?)",
+                [(name, signature, finished_at) for name, signature in signatures.items()],
+            )
+
+
+# ========= RUNNER =========
+def run_stage(stage: Stage) -> None:
+    try:
+        runpy.run_path(os.path.join(SCRIPT_DIR, stage.script), run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"exited with code {e.code}") from None
+
+
+def run_pipeline(stages: Sequence[Stage] = STAGES, force: bool = False, dry_run: bool = False,
+                 workers: int = MAX_PARALLEL_STAGES) -> bool:
+    """Run every out-of-date stage in dependency order; returns False if a stage failed."""
+    by_script = {stage.script: stage for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.after if dep not in by_script]
+        if unknown:
+            raise ValueError(f"Stage '{stage.script}' depends on unknown stage(s): {', '.join(unknown)}")
+
+    ran, done, failed = set(), set(), set()
+    pending = list(stages)
+    running = {}
+    with PipelineState() as state, workbook_session(EXTRACT_PATH) as book, ThreadPoolExecutor(max(1, workers)) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if any(dep in failed for dep in stage.after):
+                    print(f"⏭️ {stage.name}: not run, an upstream stage failed")
+                    failed.add(stage.script)
+                    pending.remove(stage)
+                    continue
+                if not all(dep in done for dep in stage.after) or len(running) >= max(1, workers):
+                    continue
+                if any(stage.locks & other.locks for other in running.values()):
+                    continue
+
+                upstream_ran = [dep for dep in stage.after if dep in ran]
+                if not force and not upstream_ran and state.signature(stage.script) == input_signature(stage):
+                    print(f"✅ {stage.name}: up to date, skipped")
+                    done.add(stage.script)
+                    pending.remove(stage)
+                    continue
+                reason = "forced" if force else (f"upstream ran ({', '.join(upstream_ran)})" if upstream_ran else "inputs changed")
+                pending.remove(stage)
+                if dry_run:
+                    print(f"▶️ {stage.name}: would run ({reason})")
+                    ran.add(stage.script)
+                    done.add(stage.script)
+                    continue
+
+                if EXTRACT_PATH in stage.reads_files:
+                    book.flush()  # the script reads Extract.xlsx from disk
+                print(f"\n▶️ {stage.name}: running ({reason})", flush=True)
+                running[pool.submit(run_stage, stage)] = stage
+
+            if not running:
+                if pending and not any(all(dep in done for dep in stage.after) for stage in pending):
+                    raise ValueError(f"Stage dependencies form a cycle: {', '.join(stage.script for stage in pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ {stage.name}: failed: {e!r}", flush=True)
+                    failed.add(stage.script)
+                else:
+                    ran.add(stage.script)
+                    done.add(stage.script)
+                    print(f"✅ {stage.name}: finished", flush=True)
+
+        if not dry_run:
+            # Save the shared workbook before recording what the stages' inputs look like now
+            book.flush()
+            state.save({script: input_signature(by_script[script]) for script in done})
+
+    print(f"\n🏁 Pipeline {'checked' if dry_run else 'finished'}: {len(ran)} stage(s) "
+          f"{'to run' if dry_run else 'ran'}, {len(done) - len(ran)} up to date, {len(failed)} failed or not run")
+    return not failed
+
+
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the PIA pipeline stages that are out of date.")
+    parser.add_argument("--force", action="store_true", help="run every stage, even if its inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only show which stages would run")
+    parser.add_argument("--workers", type=int, default=MAX_PARALLEL_STAGES, help="stages to run at the same time")
+    # Read by the extraction stages themselves (extraction_rules.run_options)
+    parser.add_argument("--pdf-workers", type=int, default=PDF_WORKERS,
+                        help="PDFs the Raw Extract stage extracts at the same time (process pool)")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                        help="only re-extract Raw Extract cells whose PDF or rules changed (default: recompute all)")
+    args = parser.parse_args()
+    raise SystemExit(0 if run_pipeline(force=args.force, dry_run=args.dry_run, workers=args.workers) else 1)
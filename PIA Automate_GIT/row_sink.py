@@ -0,0 +1,61 @@
+"""
+Columnar row accumulator for scripts that build a sheet one row at a time.
+
+Appending with `pd.concat([df, pd.DataFrame([row])])` or `df.loc[len(df)] = ...` copies the
+whole frame on every row, which is quadratic. RowSink keeps one Python list per column and
+builds the DataFrame once at the end.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+
+class RowSink:
+    """Buffers rows for a fixed list of columns (duplicate column names are kept by position)."""
+
+    def __init__(self, columns: Sequence[Any], fill: Any = pd.NA):
+        self.columns = list(columns)
+        self.fill = fill
+        self._data: List[List[Any]] = [[] for _ in self.columns]
+        self._pos: Dict[Any, int] = {}
+        for i, col in enumerate(self.columns):
+            self._pos.setdefault(col, i)
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, row: Mapping[Any, Any]) -> int:
+        """Add a row given as {column: value}; missing columns get `fill`. Returns the row's position."""
+        for col, values in zip(self.columns, self._data):
+            values.append(row.get(col, self.fill))
+        self._len += 1
+        return self._len - 1
+
+    def append_values(self, values: Sequence[Any]) -> int:
+        """Add a row given as values in column order. Returns the row's position."""
+        if len(values) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} values, got {len(values)}")
+        for column_values, value in zip(self._data, values):
+            column_values.append(value)
+        self._len += 1
+        return self._len - 1
+
+    def get(self, pos: int, column: Any) -> Any:
+        return self._data[self._pos[column]][pos]
+
+    def set(self, pos: int, column: Any, value: Any) -> None:
+        self._data[self._pos[column]][pos] = value
+
+    def to_frame(self, base: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Build the buffered rows into one DataFrame. With `base`, return base followed by the
+        buffered rows (one concat, columns aligned as pd.concat does).
+        """
+        frame = pd.DataFrame(dict(enumerate(self._data)), index=pd.RangeIndex(self._len))
+        frame.columns = self.columns
+        if base is None:
+            return frame
+        if not self._len:
+            return base
+        return pd.concat([base, frame], ignore_index=True)
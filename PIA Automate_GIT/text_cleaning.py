@@ -0,0 +1,205 @@
+"""
+Text cleaners used by the Raw Extract rules (extraction_rules.json).
+
+A rule names its cleaners by their key in CLEANERS. Document cleaners take the joined PDF
+text; response cleaners take one extracted Response plus the keyword arguments given in the
+rule entry.
+
+Every pattern is compiled once per process. The phrase lists of a rule are folded into
+combined alternations, so a cleaner makes a fixed number of passes over the text however
+many phrases it removes or repairs (bench_text_cleaning.py measures the difference).
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+# ---------------- Phrase alternations ----------------
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _boundary(s: str, i: int) -> bool:
+    """Whether \\b holds at index i of s (edges count as boundaries: the text around is unknown)."""
+    if i <= 0 or i >= len(s):
+        return True
+    return _is_word(s[i - 1]) != _is_word(s[i])
+
+
+def _interacts(a: str, b: str) -> bool:
+    """
+    True if whole-word, case-insensitive matches of `a` and `b` can overlap in some text.
+    Such phrases must stay in separate passes so the earlier one in the list still wins,
+    exactly as when each phrase was substituted on its own.
+    """
+    a, b = a.lower(), b.lower()
+    for x, y in ((a, b), (b, a)):
+        start = x.find(y)
+        while start != -1:
+            if _boundary(x, start) and _boundary(x, start + len(y)):
+                return True
+            start = x.find(y, start + 1)
+        # a suffix of x that is a prefix of y
+        for k in range(1, min(len(x), len(y))):
+            if x[-k:] == y[:k] and _boundary(x, len(x) - k) and _boundary(y, k):
+                return True
+    return False
+
+
+def _group_passes(phrases: Sequence[str], key: Callable[[str], str] = str) -> List[List[str]]:
+    """
+    Split `phrases` (in order) into runs of mutually non-overlapping phrases, one pass each.
+    `key` maps a phrase to the form its matches take in the text, for the overlap test.
+    """
+    passes: List[List[str]] = []
+    for phrase in phrases:
+        if passes and not any(_interacts(key(phrase), key(other)) for other in passes[-1]):
+            passes[-1].append(phrase)
+        else:
+            passes.append([phrase])
+    return passes
+
+
+def _alternation(alternatives: Sequence[str], first_chars: Sequence[str]) -> re.Pattern:
+    """
+    Case-insensitive non-capturing alternation. The leading lookahead on the phrases' first
+    characters lets the regex engine skip ahead to candidate positions instead of trying
+    every alternative at every character.
+    """
+    chars = "".join(re.escape(c) for c in dict.fromkeys(c.lower() for c in first_chars))
+    return re.compile(f"(?=[{chars}])(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _removal_patterns(phrases: Tuple[str, ...]) -> Tuple[re.Pattern, ...]:
+    return tuple(
+        _alternation([r"\b" + re.escape(p) + r"\b" for p in group], [p[0] for p in group])
+        for group in _group_passes([p for p in phrases if p])
+    )
+
+
+_EXCEPTION_SEP = r"(?:\s+|\s*\|\s*)"
+_EXCEPTION_SPLIT_RE = re.compile(r"[\s|]+")
+
+
+@lru_cache(maxsize=None)
+def _exception_patterns(exception_phrases: Tuple[str, ...]) -> Tuple[Tuple[re.Pattern, Dict[str, str]], ...]:
+    """Per pass: (pattern, {casefolded phrase: repaired phrase}) for phrases of two or more words."""
+    canonical = [" ".join(phrase.split()) for phrase in exception_phrases if len(phrase.split()) >= 2]
+    passes = []
+    # Tokens may be separated by any run of whitespace and "|", so compare phrases in that form
+    for group in _group_passes(canonical, key=lambda p: _EXCEPTION_SPLIT_RE.sub(" ", p).strip()):
+        pattern = _alternation(
+            [r"\b" + _EXCEPTION_SEP.join(re.escape(tok) for tok in phrase.split()) + r"\b" for phrase in group],
+            [phrase[0] for phrase in group],
+        )
+        passes.append((pattern, {phrase.casefold(): phrase for phrase in group}))
+    return tuple(passes)
+
+
+def _repair(match: re.Match, replacements: Dict[str, str]) -> str:
+    """The repaired phrase for a match of one exception pass (phrases in a pass cannot overlap)."""
+    key = " ".join(_EXCEPTION_SPLIT_RE.split(match.group(0))).casefold()
+    if key in replacements:
+        return replacements[key]
+    for phrase in replacements.values():
+        tokens_re = _EXCEPTION_SEP.join(re.escape(tok) for tok in phrase.split())
+        if re.fullmatch(tokens_re, match.group(0), re.IGNORECASE):
+            return phrase
+    return match.group(0)
+
+
+# ---------------- Document cleaners ----------------
+_PAGE_NUMBER_RE = re.compile(r"\bPage\s*\d+\b", re.IGNORECASE)
+_SLASH_DATE_RE = re.compile(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b")
+_CLOCK_TIME_RE = re.compile(r"\b\d{1,2}:\d{2}(?:\s?[APMapm]{2})?\b")
+_MONTH_DATE_RE = re.compile(r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},\s+\d{4}\b")
+_ASSESSMENT_RE = re.compile(r"Assessment questions", re.IGNORECASE)
+_SECTION_HEADER_RE = re.compile(r"\bSection\s+\d+(\.\d+)*\b", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def clean_text(text):
+    lines = text.splitlines()
+    cleaned_lines = []
+    prev_line = ""
+    for line in lines:
+        line = line.strip()
+        if line and line != prev_line:
+            cleaned_lines.append(line)
+        prev_line = line
+
+    text = " ".join(cleaned_lines)
+
+    # Remove page numbers, timestamps, dates
+    text = _PAGE_NUMBER_RE.sub("", text)
+    text = _SLASH_DATE_RE.sub("", text)
+    text = _CLOCK_TIME_RE.sub("", text)
+    text = _MONTH_DATE_RE.sub("", text)
+
+    # Remove "Assessment questions"
+    text = _ASSESSMENT_RE.sub("", text)
+
+    # Remove section headers globally (but keep bullet numbers)
+    text = _SECTION_HEADER_RE.sub("", text)
+
+    # Normalize spaces
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+
+    return text
+
+
+# ---------------- Response cleaners ----------------
+_PIPE_SEP_RE = re.compile(r"\s*\|\s*")
+_FRACTION_RE = re.compile(r"\b\d+\s*/\s*\d+\b")
+_YEAR_TIME_RE = re.compile(r"\d{4}\s+\d{1,2}:\d{2}\s*(AM|PM)?")
+_TIME_RE = re.compile(r"\d{1,2}:\d{2}\s*(AM|PM)?")
+_DATE_RE = re.compile(r"\d{2}/\d{2}/\d{4}")
+
+def fix_exceptions(text, exception_phrases):
+    for pattern, replacements in _exception_patterns(tuple(exception_phrases)):
+        text = pattern.sub(lambda m: _repair(m, replacements), text)
+    return text
+
+def clean_extracted_text(raw_text, exception_phrases: Sequence[str] = ()):
+    # Split lines and remove empty
+    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
+
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_lines = []
+    for line in lines:
+        if line not in seen:
+            seen.add(line)
+            unique_lines.append(line)
+
+    # Join with separator
+    text = " | ".join(unique_lines)
+
+    # Global deduplication after joining
+    parts = text.split(" | ")
+    text = " | ".join(dict.fromkeys(parts))  # preserves order
+
+    # Fix exceptions where ' | ' splits phrases
+    text = fix_exceptions(text, exception_phrases)
+
+    # Normalize spacing
+    text = _PIPE_SEP_RE.sub(" | ", text).strip(" |")
+    return text
+
+def remove_unwanted_phrases(text, phrases_to_remove):
+    for pattern in _removal_patterns(tuple(phrases_to_remove)):
+        text = pattern.sub("", text)
+    text = _FRACTION_RE.sub("", text)
+    text = _YEAR_TIME_RE.sub("", text)
+    text = _TIME_RE.sub("", text)
+    text = _DATE_RE.sub("", text)
+    text = _PIPE_SEP_RE.sub(" | ", text).strip(" |")
+    return text
+
+
+# Names usable as "document_cleaner" / "response_cleaners" in extraction_rules.json
+CLEANERS: Dict[str, Callable[..., str]] = {
+    "clean_text": clean_text,
+    "clean_extracted_text": clean_extracted_text,
+    "remove_unwanted_phrases": remove_unwanted_phrases,
+}
@@ -0,0 +1,29 @@
+"""
+Vendor lexicon shared by the vendor extraction scripts (4.1 and Questions Extraction).
+
+vendor_lexicon.json lists every vendor to look for, with optional aliases:
+    {"vendors": [{"name": "Blis", "aliases": ["..."]}, ...]}
+Names and aliases are matched as whole words, case-insensitively, and reported under the
+vendor's name. All of them are compiled into one KeywordMatcher, so a line is scanned once
+whether the lexicon lists 2 vendors or 2,000.
+"""
+import json
+import os
+
+from keyword_matcher import KeywordMatcher
+
+# ========= USER CONFIG =========
+VENDOR_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor_lexicon.json")
+
+
+def load_vendor_matcher(path: str = VENDOR_LEXICON_PATH) -> KeywordMatcher:
+    """Compile the lexicon; matches come back as vendor names, in lexicon order."""
+    with open(path, encoding="utf-8") as fh:
+        vendors = json.load(fh)["vendors"]
+    terms = []
+    for vendor in vendors:
+        name = vendor["name"]
+        for term in [name, *vendor.get("aliases", [])]:
+            if term.strip():
+                terms.append((term, name))
+    return KeywordMatcher(terms, whole_word=True)
@@ -0,0 +1,109 @@
+"""
+In-memory session over one workbook (Extract.xlsx) shared by the pipeline stages.
+
+Every stage used to read its sheets with pd.read_excel and replace them with
+pd.ExcelWriter(mode="a", if_sheet_exists="replace"), and each replace makes openpyxl load and
+re-save the whole workbook. Inside a session a sheet is read from disk at most once, replaced
+sheets are kept in memory, and everything is written with one load/save when the outermost
+session closes (or at an explicit flush() checkpoint).
+
+A stage opens `workbook_session(path)`: if a driver already holds a session on that workbook
+the stage joins it, otherwise it gets its own and writes on exit, so every stage still runs on
+its own exactly as before. Reading a sheet replaced earlier in the session returns what
+pd.read_excel would return once it is saved (empty strings become NaN, numeric text becomes
+numbers, ...), so a stage sees the same data whether or not the previous stage saved it.
+"""
+import io
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import pandas as pd
+
+# Open sessions by normalized workbook path; a nested workbook_session joins the open one
+_open_sessions: Dict[str, "WorkbookSession"] = {}
+
+
+def _session_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+# ========= SAVE / RELOAD =========
+def as_saved(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    `df` as pd.read_excel returns it after df.to_excel(..., index=False) with openpyxl: the frame
+    is written to an in-memory workbook exactly as flush() writes it, and read back.
+    """
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Sheet1", index=False)
+    buffer.seek(0)
+    return pd.read_excel(buffer, sheet_name="Sheet1", engine="openpyxl")
+
+
+# ========= SESSION =========
+class WorkbookSession:
+    """Sheets of one workbook, read from disk once and written back together (safe to share between threads)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._read: Dict[str, pd.DataFrame] = {}     # sheet -> frame as on disk (or as it will be)
+        self._pending: Dict[str, pd.DataFrame] = {}  # sheet -> frame replaced since the last flush
+
+    def exists(self) -> bool:
+        """True if the workbook is on disk or has sheets waiting to be written."""
+        with self._lock:
+            return bool(self._pending) or os.path.exists(self.path)
+
+    def read(self, sheet_name: str) -> pd.DataFrame:
+        """A copy of the sheet as pd.read_excel(path, sheet_name) would return it after the next flush."""
+        with self._lock:
+            if sheet_name not in self._read:
+                if sheet_name in self._pending:
+                    self._read[sheet_name] = as_saved(self._pending[sheet_name])
+                else:
+                    self._read[sheet_name] = pd.read_excel(self.path, sheet_name=sheet_name, engine="openpyxl")
+            return self._read[sheet_name].copy()
+
+    def replace(self, sheet_name: str, df: pd.DataFrame) -> None:
+        """Replace (or add) a sheet in memory; it is written by the next flush."""
+        with self._lock:
+            self._pending[sheet_name] = df.copy()
+            self._read.pop(sheet_name, None)
+
+    def flush(self) -> None:
+        """Write every replaced sheet with one workbook load/save (other sheets are left as they are)."""
+        with self._lock:
+            if not self._pending:
+                return
+            if os.path.exists(self.path):
+                writer = pd.ExcelWriter(self.path, engine="openpyxl", mode="a", if_sheet_exists="replace")
+            else:
+                writer = pd.ExcelWriter(self.path, engine="openpyxl", mode="w")
+            with writer:
+                for sheet_name, df in self._pending.items():
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+            print(f"💾 Saved {', '.join(self._pending)} to {self.path}")
+            self._pending.clear()
+
+
+@contextmanager
+def workbook_session(path: str) -> Iterator[WorkbookSession]:
+    """
+    Join the open session on `path`, or open one that is flushed when the block exits (also on
+    error, so sheets replaced by stages that finished are not lost).
+    """
+    key = _session_key(path)
+    session = _open_sessions.get(key)
+    if session is not None:
+        yield session
+        return
+    session = WorkbookSession(path)
+    _open_sessions[key] = session
+    try:
+        yield session
+    finally:
+        del _open_sessions[key]
+        session.flush()